@@ -0,0 +1,312 @@
+"""Benchmarks of the crawler (music.crawl), run against a local stand-in for IMDb (testdata.imdb.FakeImdbServer).
+Run them from the project root, e.g. python -m benchmarks.crawlbench --pages 50 --latency 0.1 --output crawl.json;
+the results are printed (or saved) as JSON, together with the versions used, to track regressions across versions.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from datetime import datetime
+from importlib.util import find_spec
+from multiprocessing import get_context
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import argparse
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+import tracemalloc
+
+import bs4
+import requests
+from bs4 import BeautifulSoup
+
+from music.crawl import CrawlSession, get_specific_page, get_page_m_info, M_INFO_STRAINER, DEFAULT_PARSER
+from music.crawl import get_next_soup, crawl, get_m_info, CrawlCheckpoint
+from music.crawl import get_4_digit_substring, get_year, get_years, get_unicode_year_pattern
+from testdata.imdb import FakeImdbServer, list_page
+from util import utility
+
+
+def percentile(values, p):
+    """Returns the p-th percentile of values (nearest rank).
+    """
+
+    values = sorted(values)
+    return values[min(len(values) - 1, round(p / 100 * (len(values) - 1)))] if values else None
+
+
+def peak_rss():
+    """Returns the peak resident set size of the current process in KB (None where the resource module is missing).
+    """
+
+    try:
+        import resource
+    except ImportError:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def summarize(seconds, pages, items, latencies, failed_pages=0):
+    """Summarizes a run; pages and items are those of the pages fetched successfully,
+    failed_pages is the number of pages (or get_m_info() calls) that failed even after the session's retries.
+    """
+
+    return {'seconds': seconds,
+            'pages_per_second': pages / seconds,
+            'items_per_second': items / seconds,
+            'failed_pages': failed_pages,
+            'latency_p50': percentile(latencies, 50),
+            'latency_p99': percentile(latencies, 99),
+            'peak_rss_kb': peak_rss()}
+
+
+def run_get_next_soup(start_url, pages, workers):
+    """Fetches the pages one by one with get_next_soup(); the latency is that of each call.
+    The pages that fail (requests.HTTPError) are counted and skipped.
+    """
+
+    with CrawlSession(pool_size=workers) as session:
+        latencies = []
+        items = 0
+        failed_pages = 0
+        start = time.perf_counter()
+        for page in range(1, pages + 1):
+            page_start = time.perf_counter()
+            try:
+                soup = get_next_soup(start_url, page, session)
+            except requests.HTTPError:
+                failed_pages += 1
+                continue
+            latencies.append(time.perf_counter() - page_start)
+            items += len(soup.find_all('h3')) - 1
+        return summarize(time.perf_counter() - start, pages - failed_pages, items, latencies, failed_pages)
+
+
+def run_crawl(start_url, pages, workers):
+    """Crawls the pages with crawl(); the latency is the time between two consecutive soups.
+    A page that fails (requests.HTTPError) stops crawl(), so it is counted and skipped,
+    and the crawl goes on with a new crawl() of the pages after it.
+    """
+
+    with CrawlSession(pool_size=workers) as session:
+        latencies = []
+        items = 0
+        failed_pages = 0
+        remaining = deque(range(1, pages + 1))
+        start = page_start = time.perf_counter()
+        while remaining:
+            try:
+                for soup in crawl(start_url, workers=workers, session=session, pages=list(remaining)):
+                    remaining.popleft()             # the soups come in page order
+                    latencies.append(time.perf_counter() - page_start)
+                    items += len(soup.find_all('h3')) - 1
+                    page_start = time.perf_counter()
+            except requests.HTTPError:
+                remaining.popleft()
+                failed_pages += 1
+        return summarize(time.perf_counter() - start, pages - failed_pages, items, latencies, failed_pages)
+
+
+def run_get_m_info(start_url, pages, workers):
+    """Gets the movie info from the pages with get_m_info(); the latency is that of the whole call.
+    If a call fails (requests.HTTPError), it is counted and get_m_info() is called again, resuming from
+    a CrawlCheckpoint (in a temporary directory) of the pages completed since, until all the pages are in
+    or pages calls have failed.
+    """
+
+    with CrawlSession(pool_size=workers) as session, TemporaryDirectory() as directory:
+        checkpoint = None
+        failed_pages = 0
+        start = time.perf_counter()
+        while True:
+            try:
+                m_info = get_m_info(start_url, pages, workers, session, checkpoint=checkpoint)
+                completed = pages
+                break
+            except requests.HTTPError:
+                failed_pages += 1
+                checkpoint = checkpoint or CrawlCheckpoint(start_url, Path(directory))
+                if failed_pages >= pages:
+                    m_info = [info for page_info in checkpoint.pages.values() for info in page_info]
+                    completed = len(checkpoint.pages)
+                    break
+        seconds = time.perf_counter() - start
+        return summarize(seconds, completed, len(m_info), [seconds], failed_pages)
+
+
+def run_isolated(run, *args):
+    """Runs run(*args) in a fresh process, so that its peak RSS is not affected by the other benchmarks.
+    """
+
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+        return executor.submit(run, *args).result()
+
+
+def bench_crawl(pages=20, items_per_page=50, latency=0.05, jitter=0.0, error_rate=0.0, workers=(1, 4)):
+    """Runs get_next_soup(), crawl() and get_m_info() (the latter two with each number of workers)
+    against a FakeImdbServer with the given numbers of pages and items per page, latency, jitter and error rate.
+    Returns pages/sec, items/sec (of the pages fetched successfully), the number of failed pages, the number of
+    error responses (errors, including those retried by the session), p50/p99 latency (in seconds)
+    and peak RSS (in KB) of each run.
+    """
+
+    results = {}
+    with FakeImdbServer(pages=pages, items_per_page=items_per_page, delay=latency, jitter=jitter,
+                        error_rate=error_rate) as server:
+
+        def run(run_function, w):
+            errors = server.errors
+            result = run_isolated(run_function, server.start_url, pages, w)
+            result['errors'] = server.errors - errors
+            return result
+
+        results['get_next_soup'] = run(run_get_next_soup, 1)
+        for w in workers:
+            results[f'crawl, workers={w}'] = run(run_crawl, w)
+        for w in workers:
+            results[f'get_m_info, workers={w}'] = run(run_get_m_info, w)
+        results['server'] = {'requests': server.requests, 'errors': server.errors}
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=utility.get_project_dir(),
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_connection_reuse(pages=50):
+    """Fetches pages one at a time, first with requests.get() (a new connection per page)
+    and then over a CrawlSession (keep-alive connections from a pool).
+    Returns the elapsed times and the numbers of connections opened in both cases.
+    """
+
+    results = {}
+    with FakeImdbServer(pages=pages) as server:
+        urls = [get_specific_page(server.start_url, page) for page in range(1, pages + 1)]
+
+        start = time.perf_counter()
+        for url in urls:
+            requests.get(url, allow_redirects=False).text
+        results['requests.get'] = {'seconds': time.perf_counter() - start,
+                                   'connections_opened': server.connections}
+
+        connections = server.connections
+        with CrawlSession() as session:
+            start = time.perf_counter()
+            for url in urls:
+                session.get(url).text
+            results['CrawlSession'] = {'seconds': time.perf_counter() - start,
+                                       'connections_opened': session.connections_opened,
+                                       'connections_reused': session.connections_reused,
+                                       'server_connections': server.connections - connections}
+    return results
+
+
+def bench_parsers(html_files=None, repeat=5):
+    """Parses saved IMDb list pages (html_files; by default all *.html files in get_data_dir(),
+    or canned testdata.imdb pages if there are none) with each installed parser,
+    both fully and partially (parse_only=M_INFO_STRAINER), and extracts the movie info from the soups.
+    Returns the median parse time per page and the peak memory (tracemalloc) of parsing a page, per backend.
+    """
+
+    html_files = html_files if html_files is not None else sorted(utility.get_data_dir().glob('*.html'))
+    pages = [f.read_text(encoding='utf-8', errors='replace') for f in html_files] or \
+            [list_page(page, pages=5) for page in range(1, 6)]
+    parsers = [parser for parser, module in [('html.parser', 'html'), ('lxml', 'lxml'), ('html5lib', 'html5lib')]
+               if find_spec(module)]
+
+    results = {}
+    expected = None
+    for parser in parsers:
+        for parse_only in [None, M_INFO_STRAINER]:
+            times = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                for page in pages:
+                    BeautifulSoup(page, features=parser, parse_only=parse_only)
+                times.append((time.perf_counter() - start) / len(pages))
+
+            tracemalloc.start()
+            soup = BeautifulSoup(pages[0], features=parser, parse_only=parse_only)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            m_info = [get_page_m_info(BeautifulSoup(page, features=parser, parse_only=parse_only)) for page in pages]
+            expected = expected or m_info
+            results[f'{parser}, {"partial" if parse_only else "full"}'] = {
+                'seconds_per_page': statistics.median(times),
+                'peak_bytes_per_page': peak,
+                'same_m_info': m_info == expected,
+                'soup_tags': len(soup.find_all(True))
+            }
+    return results
+
+
+def bench_years(spans_per_page=50, pages=2000, repeat=5):
+    """Extracts years from IMDb-like year spans ('(2000)', '(1988, part 2)', '(video, 2002)', '(I) (2019)',...),
+    page by page, with get_4_digit_substring(), get_year() and get_years().
+    Returns the time per span of each extractor (the best of repeat runs), the speedup of get_years() over get_year()
+    and whether all of them produce the same years, on the spans and on random strings with non-ASCII digits
+    as well (e.g. '²', '٣', '①').
+    """
+
+    templates = ['({})', '({}, part 2)', '(video, {})', '(I) ({})', '(TV Series {}– )', '']
+    spans = [[random.choice(templates).format(random.randint(1900, 2030)) for _ in range(spans_per_page)]
+             for _ in range(pages)]
+    extractors = {'get_4_digit_substring': lambda page: [get_4_digit_substring(span) for span in page],
+                  'get_year': lambda page: [get_year(span) for span in page],
+                  'get_years': get_years}
+
+    get_unicode_year_pattern()                  # built once, on first use; not part of the measurements
+    results = {}
+    years = []
+    for name, extract in extractors.items():
+        seconds = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            extracted = [extract(page) for page in spans]
+            seconds.append(time.perf_counter() - start)
+        years.append(extracted)
+        results[name] = {'seconds_per_span': min(seconds) / (spans_per_page * pages)}
+    results['get_years_speedup'] = results['get_year']['seconds_per_span'] / results['get_years']['seconds_per_span']
+    results['same_years'] = all(y == years[0] for y in years)
+    strings = [''.join(random.choices('0123456789 (),a²٣①–', k=random.randint(0, 12))) for _ in range(10000)]
+    results['same_years_random'] = all(extract(strings) == extractors['get_4_digit_substring'](strings)
+                                       for extract in extractors.values())
+    return results
+
+
+if __name__ == '__main__':
+
+    arg_parser = argparse.ArgumentParser(description='Crawler benchmarks against a local stand-in for IMDb.')
+    arg_parser.add_argument('--pages', type=int, default=20, help='the number of list pages')
+    arg_parser.add_argument('--items', type=int, default=50, help='the number of movies per page')
+    arg_parser.add_argument('--latency', type=float, default=0.05, help='the latency of each page, in seconds')
+    arg_parser.add_argument('--jitter', type=float, default=0.0, help='the max random extra latency, in seconds')
+    arg_parser.add_argument('--error-rate', type=float, default=0.0, help='the fraction of failed requests')
+    arg_parser.add_argument('--workers', type=int, nargs='+', default=[1, 4], help='the numbers of crawl() workers')
+    arg_parser.add_argument('--output', type=Path, help='the JSON file to save the results to (default: stdout)')
+    args = arg_parser.parse_args()
+
+    results = {'timestamp': datetime.now().isoformat(timespec='seconds'),
+               'commit': git_commit(),
+               'python': platform.python_version(),
+               'bs4': bs4.__version__,
+               'requests': requests.__version__,
+               'parser': DEFAULT_PARSER,
+               'config': {k: str(v) if isinstance(v, Path) else v for k, v in vars(args).items()},
+               'crawl': bench_crawl(args.pages, args.items, args.latency, args.jitter, args.error_rate, args.workers),
+               'connection_reuse': bench_connection_reuse(),
+               'parsers': bench_parsers(),
+               'years': bench_years()}
+    results_json = json.dumps(results, indent=4)
+    if args.output:
+        args.output.write_text(results_json, encoding='utf-8')
+    else:
+        print(results_json)
@@ -0,0 +1,163 @@
+"""Benchmarks of the playlist class (music.playlist).
+Run them from the project root, e.g. python -m benchmarks.playlistbench; the results are printed as JSON.
+"""
+
+from datetime import date
+import json
+import os
+import shutil
+
+from music.playlist import Playlist, PlaylistView, PlaylistEncoder, playlist_json_to_py, write_playlists_str, \
+    read_playlists_str, load_playlist_files
+from music.song import Song, song_py_to_json, song_json_to_py
+from util.utility import date_py_to_json, date_json_to_py, get_data_dir
+from benchmarks.songbench import titles, best_time
+
+
+def legacy_playlist_py_to_json(playlist):
+    """playlist_py_to_json() as it was before the nested codec, with the songs double encoded (as a JSON string).
+    """
+
+    d = playlist.__dict__.copy()
+    d["songs"] = json.dumps(playlist.songs, default=song_py_to_json)
+    d["created"] = date_py_to_json(playlist.created)
+    d["completed"] = date_py_to_json(playlist.completed)
+    return {"__Playlist__": d}
+
+
+def legacy_playlist_json_to_py(playlist_json):
+    """playlist_json_to_py() as it was before the nested codec (including losing the name of the playlist).
+    """
+
+    if "__Playlist__" in playlist_json:
+        p = Playlist('')
+        d = playlist_json["__Playlist__"]
+        p.songs = tuple(json.loads(d["songs"], object_hook=song_json_to_py))
+        p.created = date_json_to_py(d["created"])
+        p.completed = date_json_to_py(d["completed"])
+        return p
+    return playlist_json
+
+
+class LegacyIterPlaylist(Playlist):
+    """Playlist with the iteration as it was before Playlist.__iter__() returned a new iterator
+    (the iterator counter in the playlist itself, and __next__() in the playlist class).
+    """
+
+    def __iter__(self):
+        self.__i = 0
+        return self
+
+    def __next__(self):
+        if self.__i < len(self.songs):
+            s = self.songs[self.__i]
+            self.__i += 1
+            return s
+        else:
+            raise StopIteration
+
+
+def playlists(n_playlists, n_songs):
+    """Returns n_playlists playlists with n_songs songs each (Song objects, which the legacy codec can encode).
+    """
+
+    song_titles = titles(n_songs)
+    return [Playlist(f'Playlist {i}', *[Song(title, is_unplugged=j % 2 == 1) for j, title in enumerate(song_titles)],
+                     created=date(2020, 1, 1), completed=date(2021, 1, 1))
+            for i in range(n_playlists)]
+
+
+def bench_playlist_json(n_playlists=20, n_songs=5000, repeat=3):
+    """Returns the encoding/decoding times (in seconds) and JSON sizes (in characters) of a list of n_playlists
+    playlists with n_songs songs each, with the legacy (double encoding) codec and with the nested codec.
+    """
+
+    pls = playlists(n_playlists, n_songs)
+    codecs = {'legacy': (lambda: json.dumps(pls, default=legacy_playlist_py_to_json),
+                         lambda s: json.loads(s, object_hook=legacy_playlist_json_to_py)),
+              'nested': (lambda: json.dumps(pls, cls=PlaylistEncoder),
+                         lambda s: json.loads(s, object_hook=playlist_json_to_py))}
+    results = {}
+    for name, (encode, decode) in codecs.items():
+        pls_json, encode_time = best_time(encode, repeat)
+        decoded, decode_time = best_time(lambda: decode(pls_json), repeat)
+        results[name] = {'encode_s': encode_time, 'decode_s': decode_time, 'json_chars': len(pls_json),
+                         'songs_ok': [p.songs for p in decoded] == [p.songs for p in pls]}
+    legacy_json = codecs['legacy'][0]()
+    results['nested_reads_legacy'] = json.loads(legacy_json, object_hook=playlist_json_to_py) == pls
+    return results
+
+
+def bench_playlist_str(n_playlists=20, n_songs=5000, repeat=3):
+    """Returns the times (in seconds) of getting the names (and dates) of n_playlists playlists with n_songs songs each
+    from their Playlist.__str__() strings, eagerly (Playlist.from_playlist_str()) and lazily (PlaylistView),
+    from strings in memory and from a text export file (read_playlists_str()), as well as the times of parsing
+    all the songs both ways. The text export file is written to (and then removed from) the data directory.
+    """
+
+    pls = playlists(n_playlists, n_songs)
+    strings = [str(p) for p in pls]
+    file = 'playlistbench.txt'
+    write_playlists_str(pls, file)
+    cases = {'names_eager': lambda: [Playlist.from_playlist_str(s).name for s in strings],
+             'names_lazy': lambda: [PlaylistView(s).name for s in strings],
+             'names_lazy_file': lambda: [view.name for view in read_playlists_str(file)],
+             'all_songs_eager': lambda: [Playlist.from_playlist_str(s) for s in strings],
+             'all_songs_lazy': lambda: [PlaylistView(s).to_playlist() for s in strings]}
+    results = {}
+    try:
+        for name, case in cases.items():
+            result, results[name + '_s'] = best_time(case, repeat)
+    finally:
+        (get_data_dir() / file).unlink()
+    return results
+
+
+def bench_playlist_iteration(n_songs=100000, repeat=5):
+    """Returns the time per song (in nanoseconds) of a for loop over a playlist with n_songs songs,
+    with the legacy iteration (LegacyIterPlaylist) and with the current one (Playlist).
+    """
+
+    songs = playlists(1, n_songs)[0].songs
+    results = {}
+    for name, cls in {'legacy': LegacyIterPlaylist, 'current': Playlist}.items():
+        pl = cls('Playlist', *songs, created=date(2020, 1, 1), completed=date(2021, 1, 1))
+
+        def loop():
+            for song in pl:
+                pass
+
+        result, time_s = best_time(loop, repeat)
+        results[name + '_ns_per_song'] = time_s / n_songs * 1e9
+    return results
+
+
+def bench_playlist_files(n_files=200, playlists_per_file=10, n_songs=500, workers=(1, 2, 4, 8), chunk_size=8):
+    """Returns the times (in seconds) of loading n_files text files with playlists_per_file playlists
+    of n_songs songs each (load_playlist_files()) with each number of workers, the speedups relative to one worker,
+    and whether the playlists are the same (and in the same order) as with one worker.
+    The files are written to (and then removed from) the playlistbench directory in the data directory.
+    """
+
+    directory = 'playlistbench'
+    pls = playlists(playlists_per_file, n_songs)
+    for i in range(n_files):
+        write_playlists_str(pls, f'{directory}/playlists-{i:05d}.txt')
+    results = {'cpu_count': os.cpu_count()}
+    try:
+        expected = None
+        for w in workers:
+            loaded, load_time = best_time(lambda: load_playlist_files(directory, workers=w, chunk_size=chunk_size), 1)
+            expected = loaded if expected is None else expected
+            results[f'workers={w}'] = {'load_s': load_time, 'speedup': results.get('workers=1', {}).get(
+                'load_s', load_time) / load_time, 'same_playlists': loaded == expected}
+    finally:
+        shutil.rmtree(get_data_dir() / directory)
+    return results
+
+
+if __name__ == '__main__':
+
+    print(json.dumps({'playlist_json': bench_playlist_json(), 'playlist_str': bench_playlist_str(),
+                      'playlist_iteration': bench_playlist_iteration(),
+                      'playlist_files': bench_playlist_files()}, indent=4))
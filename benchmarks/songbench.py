@@ -0,0 +1,244 @@
+"""Benchmarks of the song classes (music.song).
+Run them from the project root, e.g. python -m benchmarks.songbench; the results are printed as JSON.
+"""
+
+import json
+import sys
+import time
+import tracemalloc
+
+from music.song import Song, Ballad, PianoSong, PianoBallad, SongEncoder, song_json_to_py, songs_py_to_json, \
+    songs_json_to_py, unplugged_title
+from music.enums import Tempo, Instrument
+
+
+class DictSong:
+    """Song as it was before it got __slots__, with its data fields in a per-object __dict__
+    (DictBallad, DictPianoSong and DictPianoBallad mirror Ballad, PianoSong and PianoBallad in the same way).
+    """
+
+    def __init__(self, title, is_unplugged=False):
+        self._Song__title = title
+        self.is_unplugged = is_unplugged
+
+
+class DictBallad(DictSong):
+
+    def __init__(self, tempo=Tempo.SLOW, **kwargs):
+        super().__init__(**kwargs)
+        self.tempo = tempo
+
+
+class DictPianoSong(DictSong):
+
+    def __init__(self, instrument=Instrument.PIANO, **kwargs):
+        super().__init__(**kwargs)
+        self.instrument = instrument
+
+
+class DictPianoBallad(DictBallad, DictPianoSong):
+    pass
+
+
+class UninternedSong(Song):
+    """Song as it was before the titles were interned: no interning of the titles, and __str__() and from_str()
+    that build new strings on each call.
+    """
+
+    __slots__ = ()
+
+    @property
+    def title(self):
+        return self._Song__title
+
+    @title.setter
+    def title(self, title):
+        self._Song__title = title
+
+    def __str__(self):
+        return self.title + ' (unplugged)' if self.is_unplugged else self.title
+
+    @classmethod
+    def from_str(cls, song_string):
+        t = song_string.split(' (unplugged)')[0]
+        u = True if song_string.endswith(' (unplugged)') else False
+        return cls(t, u)
+
+
+class FieldsEqBallad(Ballad):
+    """Ballad with __eq__() and __hash__() as they were before the comparison key: __eq__() compares all the data
+    fields (_fields(), formerly __dict__) if the classes are the same, __hash__() hashes the title and is_unplugged.
+    """
+
+    __slots__ = ()
+
+    def __eq__(self, other):
+        return self._fields() == other._fields() if type(self) is type(other) else False
+
+    def __hash__(self):
+        return hash((self.title, self.is_unplugged))
+
+
+def titles(n):
+    return [f'Song {i}' for i in range(n)]
+
+
+def bytes_per_object(make, n):
+    """Returns the average memory (tracemalloc) taken by the objects created by make(title) for n distinct titles
+    (the titles themselves are created, and interned, in advance and not counted).
+    """
+
+    song_titles = [sys.intern(title) for title in titles(n)]
+    tracemalloc.start()
+    objects = [make(title) for title in song_titles]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    size -= len(objects) * 8 + 56                   # the list of the objects
+    return size / n
+
+
+def bench_song_memory(n=100000):
+    """Returns the bytes per song of each class in the Song hierarchy,
+    with __slots__ (now) and with per-object __dict__ (before).
+    """
+
+    classes = {'Song': (Song, DictSong), 'Ballad': (Ballad, DictBallad),
+               'PianoSong': (PianoSong, DictPianoSong), 'PianoBallad': (PianoBallad, DictPianoBallad)}
+    results = {}
+    for name, (slotted_class, dict_class) in classes.items():
+        results[name] = {'bytes_per_song': bytes_per_object(lambda t: slotted_class(title=t), n),
+                         'bytes_per_song_with_dict': bytes_per_object(lambda t: dict_class(title=t), n)}
+    return results
+
+
+def mixed_songs(n):
+    """Returns n songs of all the classes in the Song hierarchy, in turn.
+    """
+
+    makes = [lambda t: Song(t, is_unplugged=True), lambda t: Ballad(title=t, tempo=Tempo.MODERATE),
+             lambda t: PianoSong(title=t), lambda t: PianoBallad(title=t, is_unplugged=True)]
+    return [makes[i % len(makes)](title) for i, title in enumerate(titles(n))]
+
+
+def best_time(function, repeat=3):
+    """Returns the result of function() and the best of its repeat run times (in seconds).
+    """
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return result, min(times)
+
+
+def bench_song_json(n=100000, repeat=3):
+    """Returns the encoding/decoding times (in seconds) and JSON sizes (in characters) of n songs
+    with the per-object (type-tagged) codec (SongEncoder, song_json_to_py()) and with the bulk codec
+    (songs_py_to_json(), songs_json_to_py(), in the record and the columnar layouts),
+    on Song objects and on mixed songs of all the classes in the hierarchy (mixed_songs()).
+    """
+
+    songs = [Song(title, is_unplugged=i % 2 == 1) for i, title in enumerate(titles(n))]
+    mixed = mixed_songs(n)
+    codecs = {'per_object': (songs, lambda: json.dumps(songs, cls=SongEncoder),
+                             lambda s: json.loads(s, object_hook=song_json_to_py)),
+              'bulk_records': (songs, lambda: songs_py_to_json(songs), songs_json_to_py),
+              'bulk_columnar': (songs, lambda: songs_py_to_json(songs, columnar=True), songs_json_to_py),
+              'per_object_mixed': (mixed, lambda: json.dumps(mixed, cls=SongEncoder),
+                                   lambda s: json.loads(s, object_hook=song_json_to_py)),
+              'bulk_records_mixed': (mixed, lambda: songs_py_to_json(mixed), songs_json_to_py)}
+    results = {}
+    for name, (original, encode, decode) in codecs.items():
+        songs_json, encode_time = best_time(encode, repeat)
+        decoded, decode_time = best_time(lambda: decode(songs_json), repeat)
+        results[name] = {'encode_s': encode_time, 'decode_s': decode_time, 'json_chars': len(songs_json),
+                         'round_trip_ok': decoded == original and list(map(type, decoded)) == list(map(type, original))}
+    return results
+
+
+def song_strings(n, distinct):
+    """Generates n song strings (as made by Song.__str__()) with distinct different titles, every other one unplugged;
+    each string is a new str object, as if read from a file.
+    """
+
+    for i in range(n):
+        yield f'Song {i % distinct}' + (' (unplugged)' if i % 2 else '')
+
+
+def bench_song_str(n=1000000, distinct=10000, repeat=3):
+    """Returns the memory taken (tracemalloc, in MB) by n songs parsed by from_str() (song_strings()),
+    and the times (in seconds) of parsing them and of rendering them all with __str__() (twice, as when a playlist
+    is printed repeatedly), with the titles interned (Song) and not (UninternedSong).
+    """
+
+    strings = list(song_strings(n, distinct))
+    results = {}
+    for name, cls in {'interned': Song, 'uninterned': UninternedSong}.items():
+        unplugged_title.cache_clear()
+        tracemalloc.start()
+        songs = [cls.from_str(s) for s in song_strings(n, distinct)]
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del songs
+        unplugged_title.cache_clear()
+        songs, parse_time = best_time(lambda: [cls.from_str(s) for s in strings], repeat)
+        result, render_time = best_time(lambda: ['; '.join([str(song) for song in songs]) for _ in range(2)], repeat)
+        results[name] = {'memory_mb': size / 2**20, 'parse_s': parse_time, 'render_s': render_time}
+    return results
+
+
+def bench_song_eq(n=100000, repeat=3):
+    """Returns the times (in seconds) of comparing n pairs of equal ballads, deduplicating 2n ballads (n distinct)
+    and sorting n ballads, with the comparison key (Ballad) and with the field comparison (FieldsEqBallad,
+    which cannot be sorted). Each is timed on new objects (cold: the keys are computed)
+    and then again on the same objects (warm: the keys are cached).
+    """
+
+    song_titles = titles(n)
+    results = {}
+    for name, cls in {'key': Ballad, 'fields': FieldsEqBallad}.items():
+        for case, run in {'eq': lambda a, b: [x == y for x, y in zip(a, b)],
+                          'dedup': lambda a, b: dict.fromkeys(a + b),
+                          'sort': lambda a, b: sorted(a)}.items():
+            if case == 'sort' and cls is FieldsEqBallad:
+                continue
+            a = [cls(title=t, tempo=Tempo.SLOW) for t in reversed(song_titles)]
+            b = [cls(title=t, tempo=Tempo.SLOW) for t in reversed(song_titles)]
+            result, cold = best_time(lambda: run(a, b), 1)
+            result, warm = best_time(lambda: run(a, b), repeat)
+            results[f'{case}_{name}'] = {'cold_s': cold, 'warm_s': warm}
+    return results
+
+
+def bench_song_factory(n=1000000, repeat=3):
+    """Returns the times (in seconds) of building n songs of each class in the hierarchy from rows (tuples of the
+    constructor's arguments, as if read from a CSV file) with the constructors and with the bulk factory
+    (from_records()), and whether the songs built both ways are the same.
+    """
+
+    song_titles = titles(n)
+    rows = {Song: [(t, i % 2 == 1) for i, t in enumerate(song_titles)],
+            Ballad: [(t, i % 2 == 1, Tempo.MODERATE) for i, t in enumerate(song_titles)],
+            PianoSong: [(t, i % 2 == 1, Instrument.PIANO) for i, t in enumerate(song_titles)],
+            PianoBallad: [(t, i % 2 == 1, Tempo.MODERATE, Instrument.PIANO) for i, t in enumerate(song_titles)]}
+    results = {}
+    for cls, cls_rows in rows.items():
+        if cls is Song:
+            constructed, constructor_time = best_time(lambda: [Song(*row) for row in cls_rows], repeat)
+        else:                                       # the keyword arguments are prepared in advance (not timed)
+            kwargs = [dict(zip(cls.RECORD_ARGS, row)) for row in cls_rows]
+            constructed, constructor_time = best_time(lambda: [cls(**kw) for kw in kwargs], repeat)
+        built, factory_time = best_time(lambda: cls.from_records(cls_rows), repeat)
+        results[cls.__name__] = {'constructor_s': constructor_time, 'from_records_s': factory_time,
+                                 'same_songs': built == constructed and
+                                 [s._fields() for s in built] == [s._fields() for s in constructed]}
+    return results
+
+
+if __name__ == '__main__':
+
+    print(json.dumps({'song_memory': bench_song_memory(), 'song_json': bench_song_json(),
+                      'song_str': bench_song_str(),
+                      'song_eq': bench_song_eq(),
+                      'song_factory': bench_song_factory()}, indent=4))
@@ -0,0 +1,108 @@
+"""The class representing the concept of song catalog.
+It includes a large collection of distinct songs, indexed for fast lookups.
+"""
+
+from music.song import Song
+
+
+class SongCatalog:
+    """The class representing the concept of song catalog.
+    A catalog keeps each song once (equal songs are duplicates), in the order in which the songs were added,
+    and indexes the songs by their title and is_unplugged flag. Membership tests, lookups, dedup and set operations
+    thus take O(1) time per song (using Song.__hash__() and Song.__eq__()) instead of linear scans.
+    The songs should not be changed while they are in a catalog, since that changes their hashes.
+    """
+
+    def __init__(self, songs=()):
+        self.__songs = {}                           # song -> None, i.e. an insertion-ordered set of songs
+        self.__index = {}                           # (title, is_unplugged) -> {song: None}
+        self.update(songs)
+
+    def add(self, song):
+        if not isinstance(song, Song):
+            raise TypeError('expected Song object')
+        if song not in self.__songs:
+            self.__songs[song] = None
+            self.__index.setdefault((song.title, song.is_unplugged), {})[song] = None
+
+    def update(self, songs):
+        for song in songs:
+            self.add(song)
+
+    def discard(self, song):
+        if song in self.__songs:
+            del self.__songs[song]
+            key = (song.title, song.is_unplugged)
+            del self.__index[key][song]
+            if not self.__index[key]:
+                del self.__index[key]
+
+    def find(self, title, is_unplugged=None):
+        """Returns the list of the songs in the catalog with the title (and is_unplugged, unless it is None).
+        """
+
+        flags = [False, True] if is_unplugged is None else [is_unplugged]
+        return [song for flag in flags for song in self.__index.get((title, flag), ())]
+
+    def __contains__(self, song):
+        return song in self.__songs
+
+    def __len__(self):
+        return len(self.__songs)
+
+    def __iter__(self):
+        return iter(self.__songs)
+
+    def __str__(self):
+        return '\n'.join([str(song) for song in self.__songs]) if self.__songs else '(empty)'
+
+    def __eq__(self, other):
+        return self.__songs.keys() == other.__songs.keys() if type(self) is type(other) else False
+
+    def union(self, *others):
+        catalog = SongCatalog(self)
+        for other in others:
+            catalog.update(other)
+        return catalog
+
+    def intersection(self, other):
+        return SongCatalog([song for song in self if song in other])
+
+    def difference(self, other):
+        return SongCatalog([song for song in self if song not in other])
+
+    def __or__(self, other):
+        return self.union(other)
+
+    def __and__(self, other):
+        return self.intersection(other)
+
+    def __sub__(self, other):
+        return self.difference(other)
+
+
+if __name__ == "__main__":
+
+    from testdata.songs import *
+
+    # Dedup songs
+    catalog = SongCatalog([imagine, love, Song('Imagine'), across_the_universe, Song('Love', is_unplugged=True)])
+    print(catalog)
+    print(len(catalog))
+    print()
+
+    # Membership tests and lookups
+    print(Song('Love', is_unplugged=True) in catalog)
+    print(Song('Love') in catalog)
+    print([str(song) for song in catalog.find('Love')])
+    print([str(song) for song in catalog.find('Love', is_unplugged=False)])
+    print()
+
+    # Set operations
+    other = SongCatalog([love, happiness_is_a_warm_gun])
+    print(catalog | other)
+    print()
+    print(catalog & other)
+    print()
+    print(catalog - other)
+    print()
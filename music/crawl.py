@@ -2,28 +2,610 @@
 BeautifulSoup documentation: https://www.crummy.com/software/BeautifulSoup/bs4/doc/
 """
 
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque, OrderedDict
+from functools import cache
+from hashlib import sha1
+from importlib.util import find_spec
+from itertools import filterfalse, islice
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from threading import Condition, Lock, get_ident
+import gzip
+import json
+import os
+import re
+import sys
+import time
+
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup, SoupStrainer
 
 from util import utility
 
 BASE_URL = 'https://www.imdb.com/'
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RATE_WINDOW = 5                                 # seconds
+POSTER_CLASSES = {'lister-item-image', 'ribbonize'}
+YEAR_PATTERN = re.compile(r'\d{4}')
+DEFAULT_PARSER = 'lxml' if find_spec('lxml') else 'html.parser'     # the fastest parser available to BeautifulSoup
+
+
+class TokenBucket:
+    """Token-bucket rate limiter: lets through rate requests per second on average, and bursts of up to capacity
+    requests (rate by default) after idle periods. acquire() blocks the calling thread until a token is available.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1, rate)
+        self.waiting = 0                            # the number of threads blocked in acquire()
+        self.__tokens = self.capacity
+        self.__updated = time.monotonic()
+        self.__lock = Lock()
+
+    def acquire(self):
+        with self.__lock:
+            self.waiting += 1
+        try:
+            while True:
+                with self.__lock:
+                    now = time.monotonic()
+                    self.__tokens = min(self.capacity, self.__tokens + (now - self.__updated) * self.rate)
+                    self.__updated = now
+                    if self.__tokens >= 1:
+                        self.__tokens -= 1
+                        return
+                    wait = (1 - self.__tokens) / self.rate
+                time.sleep(wait)
+        finally:
+            with self.__lock:
+                self.waiting -= 1
+
+
+class AdaptiveConcurrency:
+    """Adaptive controller of the number of concurrent requests (AIMD - additive increase, multiplicative decrease).
+    Each request waits in acquire() until fewer than limit requests are in flight, and reports its outcome in release():
+    - a success with latency <= target_latency widens the limit by 1 / limit (i.e., by 1 after limit such successes),
+      up to max_limit
+    - a response with a RETRY_STATUSES status (429, 5xx), a failure or a latency > target_latency narrows the limit
+      by the factor decrease (at most once per latency period), down to min_limit
+    - a 429/5xx response or a failure also makes new requests back off (wait) for backoff seconds;
+      the backoff doubles with each consecutive error (up to max_backoff) and is reset by a success
+    With crawl(), the limit is also bounded by the number of workers.
+    """
+
+    def __init__(self, min_limit=1, max_limit=16, initial_limit=4, target_latency=2.0, decrease=0.5,
+                 backoff=1.0, max_backoff=60.0):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = initial_limit
+        self.target_latency = target_latency
+        self.decrease = decrease
+        self.initial_backoff = backoff
+        self.max_backoff = max_backoff
+        self.backoff = 0.0                          # the current backoff (0 if the last request succeeded)
+        self.in_flight = 0
+        self.waiting = 0                            # the number of requests blocked in acquire()
+        self.errors = 0
+        self.__backoff_until = 0.0
+        self.__decreased = 0.0
+        self.__condition = Condition()
+
+    @property
+    def backoff_remaining(self):
+        return max(0.0, self.__backoff_until - time.monotonic())
+
+    def acquire(self):
+        with self.__condition:
+            self.waiting += 1
+            while True:
+                remaining = self.backoff_remaining
+                if remaining > 0:
+                    self.__condition.wait(remaining)
+                elif self.in_flight >= int(self.limit):
+                    self.__condition.wait()         # until a release()
+                else:
+                    break
+            self.waiting -= 1
+            self.in_flight += 1
+
+    def release(self, status, latency):
+        """Reports the outcome of a request: its HTTP status (None if it failed) and latency (in seconds).
+        """
+
+        with self.__condition:
+            self.in_flight -= 1
+            now = time.monotonic()
+            error = status is None or status in RETRY_STATUSES
+            if error or latency > self.target_latency:
+                if now - self.__decreased >= latency:
+                    self.limit = max(self.min_limit, self.limit * self.decrease)
+                    self.__decreased = now
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            if error:
+                self.errors += 1
+                self.backoff = min(self.max_backoff, self.backoff * 2 or self.initial_backoff)
+                self.__backoff_until = now + self.backoff
+            else:
+                self.backoff = 0.0
+            self.__condition.notify_all()
+
+
+class CrawlSession:
+    """A reusable HTTP session with a pool of keep-alive connections, shared by get_soup(), get_next_soup() and crawl(),
+    so that multi-page crawls reuse connections instead of paying a new TCP (and TLS) handshake for every page.
+    Parameters:
+    - pool_size: the max number of connections kept open per host (should be >= the number of crawl() workers)
+    - retries: the max number of retries of a failed request (connection errors and RETRY_STATUSES responses)
+    - backoff_factor: the retries sleep for backoff_factor * 2 ** (<retry number> - 1) seconds
+    - timeout: the connect/read timeout of each request, in seconds
+    - limiter: a TokenBucket that limits the rate of requests (no limit by default)
+    - controller: an AdaptiveConcurrency that limits the number of concurrent requests, based on their outcomes
+    Redirections are never followed (allow_redirects=False), just like with requests.get() before.
+    """
+
+    def __init__(self, pool_size=10, retries=3, backoff_factor=0.5, timeout=30, limiter=None, controller=None):
+        self.timeout = timeout
+        self.limiter = limiter
+        self.controller = controller
+        self.__completed = deque()                  # the completion times of the requests in the last RATE_WINDOW
+        self.__lock = Lock()
+        retry = Retry(total=retries, backoff_factor=backoff_factor, status_forcelist=RETRY_STATUSES,
+                      allowed_methods=['GET'], raise_on_status=False)
+        self.__adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.__session = requests.Session()
+        self.__session.mount('http://', self.__adapter)
+        self.__session.mount('https://', self.__adapter)
+
+    def get(self, url, headers=None):
+        """Sends HTTP GET request to url over a pooled connection and returns the Response object.
+        If there is a controller and/or a limiter, the request first waits for them to let it through.
+        """
+
+        if self.controller:
+            self.controller.acquire()
+        status = None
+        start = time.monotonic()
+        try:
+            if self.limiter:
+                self.limiter.acquire()
+                start = time.monotonic()
+            response = self.__session.get(url, headers=headers, timeout=self.timeout, allow_redirects=False)
+            status = response.status_code
+            # Statuses of the requests retried by the connection pool count as well (e.g. a 503 before a 200)
+            retries = getattr(response.raw, 'retries', None)
+            errors = [r.status for r in retries.history if r.status in RETRY_STATUSES] if retries else []
+            status = errors[0] if errors else status
+            return response
+        finally:
+            now = time.monotonic()
+            with self.__lock:
+                self.__completed.append(now)
+                while self.__completed[0] < now - RATE_WINDOW:
+                    self.__completed.popleft()
+            if self.controller:
+                self.controller.release(status, now - start)
+
+    @property
+    def rate(self):
+        """The number of requests per second completed in the last RATE_WINDOW seconds.
+        """
+
+        now = time.monotonic()
+        with self.__lock:
+            return len([t for t in self.__completed if t >= now - RATE_WINDOW]) / RATE_WINDOW
+
+    @property
+    def metrics(self):
+        """The current rate of requests and the state of the limiter and the controller, as a dict.
+        """
+
+        return {'rate': self.rate,
+                'rate_limit': self.limiter.rate if self.limiter else None,
+                'concurrency_limit': int(self.controller.limit) if self.controller else None,
+                'in_flight': self.controller.in_flight if self.controller else None,
+                'queue_depth': (self.limiter.waiting if self.limiter else 0) +
+                               (self.controller.waiting if self.controller else 0),
+                'backoff': self.controller.backoff if self.controller else 0.0,
+                'backoff_remaining': self.controller.backoff_remaining if self.controller else 0.0,
+                'errors': self.controller.errors if self.controller else 0}
+
+    def __pools(self):
+        pools = self.__adapter.poolmanager.pools
+        return [pools[key] for key in pools.keys()]
+
+    @property
+    def requests_sent(self):
+        return sum([pool.num_requests for pool in self.__pools()])
+
+    @property
+    def connections_opened(self):
+        return sum([pool.num_connections for pool in self.__pools()])
+
+    @property
+    def connections_reused(self):
+        return self.requests_sent - self.connections_opened
+
+    def close(self):
+        self.__session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+_session = None
+
+
+def get_session():
+    """Returns the default CrawlSession of the crawler (created on first use),
+    used by get_soup(), get_next_soup() and crawl() when no other session is passed to them.
+    """
+
+    global _session
+    if _session is None:
+        _session = CrawlSession()
+    return _session
+
+
+class ReplayResponse:
+    """Response of a ReplaySource, with the fields of requests.Response used by the crawler.
+    """
+
+    def __init__(self, url, status_code, text=''):
+        self.url = url
+        self.status_code = status_code
+        self.text = text
+        self.headers = {}
+
+    @property
+    def content(self):
+        return self.text.encode('utf-8')
+
+
+class ReplaySource:
+    """Offline replacement for CrawlSession that "fetches" pages from a local archive of saved HTML pages
+    (directory, get_data_dir() / 'pages' by default), so that the crawler runs with no network at all.
+    It can be passed as the session to get_soup(), get_next_soup(), crawl(), get_m_info(),...
+    Each list is archived in its own subdirectory, named by the sha1 of the URL without the 'page' parameter,
+    and its pages are read from page-<page>.html (with <page> taken from the 'page' parameter of the URL),
+    or from the gzip-compressed page-<page>.html.gz; archive_pages() creates such archives.
+    Missing pages get 404 responses with no text, like the pages after the last page of a list on IMDb.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or utility.get_data_dir() / 'pages'
+
+    @staticmethod
+    def page_file_name(url):
+        """Returns the name of the archive file of the page at url, relative to the directory of the archive:
+        <sha1 of url without the 'page' parameter>/page-<page>.html, so that the pages of different lists
+        (e.g., other keywords or sort orders) do not overwrite each other.
+        """
+
+        parts = urlsplit(url)
+        query = parse_qsl(parts.query, keep_blank_values=True)
+        page = next((value for name, value in query if name == 'page'), '1')
+        list_query = urlencode([(name, value) for name, value in query if name != 'page'])
+        list_url = urlunsplit(parts._replace(query=list_query))
+        return f'{sha1(list_url.encode("utf-8")).hexdigest()}/page-{page}.html'
+
+    def get(self, url, headers=None):
+        page_file = self.directory / ReplaySource.page_file_name(url)
+        if page_file.exists():
+            return ReplayResponse(url, 200, page_file.read_text(encoding='utf-8', errors='replace'))
+        page_file = page_file.with_name(page_file.name + '.gz')
+        if page_file.exists():
+            with gzip.open(page_file, 'rt', encoding='utf-8', errors='replace') as f:
+                return ReplayResponse(url, 200, f.read())
+        return ReplayResponse(url, 404)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def archive_pages(start_url: str, max_pages=1, directory=None, compress=False, session=None):
+    """Saves the first max_pages pages of the multi-page list at start_url (as they are, not as soups)
+    to directory (get_data_dir() / 'pages' by default), optionally gzip-compressed, for replay with ReplaySource.
+    Returns the list of the files saved. Raises requests.HTTPError if a page fails (see check_status()).
+    """
+
+    directory = directory or utility.get_data_dir() / 'pages'
+    session = session or get_session()
+    page_files = []
+    for page in range(1, max_pages + 1):
+        url = get_specific_page(start_url, page)
+        response = session.get(url)
+        check_status(response)
+        text = response.text
+        page_file = directory / ReplaySource.page_file_name(url)
+        page_file.parent.mkdir(parents=True, exist_ok=True)
+        if compress:
+            page_file = page_file.with_name(page_file.name + '.gz')
+            with gzip.open(page_file, 'wt', encoding='utf-8') as f:
+                f.write(text)
+        else:
+            page_file.write_text(text, encoding='utf-8', errors='replace')
+        page_files.append(page_file)
+    return page_files
+
+
+class ResponseCache:
+    """Persistent on-disk cache of crawled pages, in get_data_dir() / 'http_cache' by default.
+    Each page is stored under the URL it was fetched from (e.g., the one produced by get_specific_page()),
+    as <sha1 of the URL>.html (the response text) and <sha1 of the URL>.json (URL, ETag, Last-Modified, time stored).
+    Parameters:
+    - ttl: pages stored less than ttl seconds ago are read from disk without contacting the server (hits);
+           older pages are revalidated with a conditional request (If-None-Match/If-Modified-Since),
+           so that they are read from disk if the server responds with 304 Not Modified (revalidated)
+           and refetched otherwise (misses)
+    - max_size: the max total size of the cached pages in bytes; the least recently used pages are evicted first
+    """
+
+    def __init__(self, directory=None, ttl=24 * 60 * 60, max_size=100 * 2 ** 20):
+        self.directory = directory or utility.get_data_dir() / 'http_cache'
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.__lock = Lock()
+        self.__size = 0
+        self.__lru = OrderedDict()              # key -> page size, least recently used first
+        pages = sorted(self.directory.glob('*.html'), key=lambda f: f.stat().st_mtime)
+        for page in pages:
+            if page.with_suffix('.json').exists():
+                self.__lru[page.stem] = page.stat().st_size
+                self.__size += self.__lru[page.stem]
+        self.__evict()
+
+    @property
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'revalidated': self.revalidated,
+                'pages': len(self.__lru), 'size': self.__size}
+
+    @staticmethod
+    def key(url):
+        return sha1(url.encode('utf-8')).hexdigest()
+
+    def get_text(self, url, session):
+        """Returns the text of the page at url, from disk whenever possible,
+        and otherwise by sending HTTP GET request with session (a CrawlSession) and caching the response.
+        Raises requests.HTTPError if the response status is neither 2xx nor 404 (see check_status()).
+        """
+
+        key = ResponseCache.key(url)
+        page_file = self.directory / (key + '.html')
+        meta_file = self.directory / (key + '.json')
+        # The files are read under the lock, so that __evict() (called by other threads) cannot remove them meanwhile
+        with self.__lock:
+            try:
+                meta = json.loads(meta_file.read_text(encoding='utf-8')) if key in self.__lru else None
+                text = page_file.read_text(encoding='utf-8') if meta else None
+            except FileNotFoundError:
+                # Removed by someone else (e.g., another process using the same directory); treat it as a miss
+                self.__size -= self.__lru.pop(key)
+                meta = None
+
+        headers = None
+        if meta:
+            if time.time() - meta['stored'] < self.ttl:
+                self.__count('hits', key)
+                return text
+            headers = {}
+            if meta['etag']:
+                headers['If-None-Match'] = meta['etag']
+            if meta['last_modified']:
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        response = session.get(url, headers=headers)
+        if meta and response.status_code == 304:
+            meta['stored'] = time.time()
+            tmp_file = self.__write_temp(meta_file, json.dumps(meta))
+            with self.__lock:
+                if key in self.__lru:
+                    os.replace(tmp_file, meta_file)
+                else:
+                    tmp_file.unlink()
+            self.__count('revalidated', key)
+            return text
+
+        self.__count('misses')
+        check_status(response)
+        if response.status_code == 200:
+            self.__store(key, url, response)
+        return response.text
+
+    def __count(self, counter, key=None):
+        with self.__lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+            if key in self.__lru:
+                self.__lru.move_to_end(key)
+                try:
+                    os.utime(self.directory / (key + '.html'))
+                except FileNotFoundError:
+                    # Removed by someone else since it was read (see get_text()); forget the page
+                    self.__size -= self.__lru.pop(key)
+                    (self.directory / (key + '.json')).unlink(missing_ok=True)
+
+    def __store(self, key, url, response):
+        text = response.text.encode('utf-8')
+        if len(text) > self.max_size:
+            return
+        meta = {'url': url, 'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'), 'stored': time.time()}
+        page_file = self.directory / (key + '.html')
+        meta_file = self.directory / (key + '.json')
+        tmp_page_file = self.__write_temp(page_file, text)
+        tmp_meta_file = self.__write_temp(meta_file, json.dumps(meta))
+        with self.__lock:
+            os.replace(tmp_page_file, page_file)
+            os.replace(tmp_meta_file, meta_file)
+            self.__size += len(text) - self.__lru.pop(key, 0)
+            self.__lru[key] = len(text)
+            self.__evict()
+
+    def __evict(self):
+        while self.__size > self.max_size:
+            key, size = self.__lru.popitem(last=False)
+            self.__size -= size
+            (self.directory / (key + '.html')).unlink(missing_ok=True)
+            (self.directory / (key + '.json')).unlink(missing_ok=True)
+
+    @staticmethod
+    def __write_temp(file, data):
+        """Writes data (str or bytes) to a temporary file next to file and returns the temporary file.
+        It is then moved over file (os.replace()) under the lock, so that concurrent readers never see
+        a partially written page, and the files of a page are only ever added or removed under the lock.
+        """
+
+        tmp_file = file.with_name(f'{file.name}.{os.getpid()}.{get_ident()}.tmp')
+        if isinstance(data, str):
+            tmp_file.write_text(data, encoding='utf-8')
+        else:
+            tmp_file.write_bytes(data)
+        return tmp_file
 
+    def clear(self):
+        with self.__lock:
+            for key in self.__lru:
+                (self.directory / (key + '.html')).unlink(missing_ok=True)
+                (self.directory / (key + '.json')).unlink(missing_ok=True)
+            self.__lru.clear()
+            self.__size = 0
 
-def get_soup(url: str) -> BeautifulSoup:
+
+_cache = None
+
+
+def get_cache():
+    """Returns the default ResponseCache of the crawler (created on first use, in get_data_dir() / 'http_cache').
+    Unlike the session, the cache is used only when it is passed to get_soup(), get_next_soup(), crawl(),...
+    """
+
+    global _cache
+    if _cache is None:
+        _cache = ResponseCache()
+    return _cache
+
+
+class CrawlCheckpoint:
+    """Checkpoint store that makes crawls of multi-page IMDb movie lists resumable (see iter_m_info()).
+    Records the pages of the list at start_url completed so far, with the movie info tuples extracted from them,
+    in the file <sha1 of start_url>.jsonl in get_data_dir() / 'checkpoints' (by default), one JSON line per page.
+    Each line is appended and flushed to disk as soon as the page is completed, so a crawl that dies halfway loses
+    at most the page at hand; a rerun with the same start_url and checkpoint only fetches the missing pages.
+    """
+
+    def __init__(self, start_url, directory=None):
+        self.start_url = start_url
+        directory = directory or utility.get_data_dir() / 'checkpoints'
+        directory.mkdir(parents=True, exist_ok=True)
+        self.file = directory / (sha1(start_url.encode('utf-8')).hexdigest() + '.jsonl')
+        self.pages = {}                             # page -> list of (title, year, link, poster_link) tuples
+        if self.file.exists():
+            complete = 0                            # the size of the complete lines read so far
+            with open(self.file, 'rb') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    if not line.endswith(b'\n'):
+                        break
+                    self.pages[record['page']] = [tuple(info) for info in record['m_info']]
+                    complete += len(line)
+            # The last line is incomplete if the crawl died while writing it; drop it before appending new lines
+            os.truncate(self.file, complete)
+
+    def missing_pages(self, max_pages):
+        """Returns the list of the numbers of the pages (out of the first max_pages) not completed so far.
+        """
+
+        return [page for page in range(1, max_pages + 1) if page not in self.pages]
+
+    def record(self, page, m_info):
+        """Records page as completed, with its movie info (m_info), both in memory and on disk.
+        """
+
+        self.pages[page] = m_info
+        with open(self.file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'page': page, 'm_info': m_info}) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def clear(self):
+        self.pages = {}
+        self.file.unlink(missing_ok=True)
+
+
+class MInfoStrainer(SoupStrainer):
+    """SoupStrainer for partial parsing of IMDb movie list pages (parse_only= parameter in BeautifulSoup()).
+    Only the tags that get_m_info() consumes are materialized (with all their contents):
+    all 'h3' tags and the poster 'div' tags (class="lister-item-image ribbonize"); the rest of the page is skipped.
+    With Beautiful Soup versions before 4.13, which do not call allow_tag_creation(),
+    all 'div' tags are kept - the result is still correct, just less of the page is skipped.
+    """
+
+    def __init__(self):
+        super().__init__(['h3', 'div'])
+
+    def allow_tag_creation(self, nsprefix, name, attrs):
+        if name == 'div':
+            return POSTER_CLASSES.issubset(str((attrs or {}).get('class', '')).split())
+        return super().allow_tag_creation(nsprefix, name, attrs)
+
+
+M_INFO_STRAINER = MInfoStrainer()
+
+
+def check_status(response):
+    """Raises requests.HTTPError if the status of response (a Response or a ReplayResponse) is not 2xx,
+    except for 404 Not Found, which is how IMDb answers the pages after the last page of a list (an empty page).
+    Used by get_soup() (and ResponseCache), so that a page that failed (e.g., 429 or 5xx, even after the retries)
+    stops the crawl instead of being parsed as an empty page.
+    """
+
+    if response.status_code != 404 and not 200 <= response.status_code < 300:
+        raise requests.HTTPError(f'{response.status_code} Error for url: {response.url}', response=response)
+
+
+def get_soup(url: str, session=None, cache=None, parser=None, parse_only=None) -> BeautifulSoup:
     """Returns BeautifulSoup object from the corresponding URL, passed as a string.
-    Creates Response object from HTTP GET request, using requests.get(<url string>, allow_redirects=False),
-    and then uses the text field of the Response object and the 'html.parser' to create the BeautifulSoup object.
+    Creates Response object from HTTP GET request, using <session>.get(<url string>) over a pooled connection
+    (session is a CrawlSession, get_session() by default, or a ReplaySource; redirects are not allowed),
+    and then uses the text field of the Response object and the parser ('lxml', 'html.parser',...;
+    DEFAULT_PARSER by default) to create the BeautifulSoup object.
+    If cache (a ResponseCache) is passed, the response text is read from the cache whenever possible.
+    If parse_only (a SoupStrainer, e.g. M_INFO_STRAINER) is passed, only the matching tags are parsed.
+    Raises requests.HTTPError if the response status is neither 2xx nor 404 (see check_status()).
     """
 
-    # Create Response object from HTTP GET request; assume that no redirection is allowed (allow_redirects=False)
-    response = requests.get(url, allow_redirects=False)
+    session = session or get_session()
+    if cache is not None:
+        response_text = cache.get_text(url, session)
+    else:
+        # Create Response object from HTTP GET request; assume that no redirection is allowed (allow_redirects=False)
+        response = session.get(url)
+        check_status(response)
 
-    # Get text from the Response object, using <response>.text
-    response_text = response.text
+        # Get text from the Response object, using <response>.text
+        response_text = response.text
 
-    # Create and return the corresponding BeautifulSoup object from the response text; use 'html.parser'
-    return BeautifulSoup(response_text, features='html.parser')
+    # Create and return the corresponding BeautifulSoup object from the response text
+    return BeautifulSoup(response_text, features=parser or DEFAULT_PARSER, parse_only=parse_only)
 
 
 def get_specific_page(start_url: str, page=1):
@@ -40,29 +622,55 @@ def get_specific_page(start_url: str, page=1):
     return start_url
 
 
-def get_next_soup(start_url: str, page=1):
+def get_next_soup(start_url: str, page=1, session=None, cache=None, parser=None, parse_only=None):
     """Returns the BeautifulSoup object corresponding to a specific page
     in case there are multiple pages that list objects of interest.
     Parameters:
     - start_url: the starting page/url of a multi-page list of objects
     - page: the page number of a specific page of a multi-page list of objects
+    - session: the CrawlSession to fetch the page with (get_session() by default)
+    - cache: the ResponseCache to read the page from whenever possible (no caching by default)
+    - parser, parse_only: the parser and the SoupStrainer to use (see get_soup())
     Essentially, get_next_soup() just returns get_soup(get_specific_page(start_url, page)),
     i.e. converts the result of the call to get_specific_page(start_url, page), which is a string,
     into a BeautifulSoup object.
     """
 
-    return get_soup(get_specific_page(start_url, page))
+    return get_soup(get_specific_page(start_url, page), session, cache, parser, parse_only)
 
 
-def crawl(url: str, max_pages=1):
+def crawl(url: str, max_pages=1, workers=1, session=None, cache=None, parser=None, parse_only=None, pages=None):
     """Web crawler that collects info about movies from IMDb,
     implemented as a Python generator that yields BeautifulSoup objects (get_next_soup()) from multi-page movie lists.
     Parameters: the url of the starting IMDb page and the max number of pages to crawl in case of multi-page lists.
+    Alternatively, the numbers of the pages to crawl can be passed explicitly, as pages (then max_pages is ignored).
+    With workers > 1, the pages are fetched concurrently in a thread pool, keeping at most workers requests in flight
+    (a sliding window over the pages), but the soups are still yielded in page order.
+    All pages are fetched over the connections of the same session (CrawlSession, get_session() by default),
+    and read from cache (ResponseCache) instead whenever possible if cache is passed.
+    The soups are created with parser and parse_only (see get_soup()).
     """
 
-    for page in range(max_pages):
-        yield get_next_soup(url, page + 1)
-        page += 1
+    session = session or get_session()
+    pages = pages if pages is not None else range(1, max_pages + 1)
+    if workers <= 1:
+        for page in pages:
+            yield get_next_soup(url, page, session, cache, parser, parse_only)
+        return
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+    pages = iter(pages)
+    in_flight = deque([executor.submit(get_next_soup, url, page, session, cache, parser, parse_only)
+                       for page in islice(pages, workers)])
+    try:
+        while in_flight:
+            soup = in_flight.popleft().result()
+            page = next(pages, None)
+            if page is not None:
+                in_flight.append(executor.submit(get_next_soup, url, page, session, cache, parser, parse_only))
+            yield soup
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
 
 
 def get_4_digit_substring(a_string):
@@ -78,11 +686,68 @@ def get_4_digit_substring(a_string):
     return None
 
 
-def get_m_info(start_url: str, max_pages=1):
+@cache
+def get_non_decimal_digits():
+    """Returns the frozenset of all the characters c for which c.isdigit() is True but c.isdecimal() is not,
+    i.e. the digits like '²' or '①' that are not decimal digits (\\d), unlike e.g. '٣' (Arabic-Indic three).
+    Built on first use, since it takes a scan over all Unicode characters.
+    """
+
+    return frozenset([c for c in map(chr, range(sys.maxunicode + 1)) if c.isdigit() and not c.isdecimal()])
+
+
+@cache
+def get_unicode_year_pattern():
+    """Returns the precompiled pattern that matches 4 consecutive characters c for which c.isdigit() is True.
+    Unlike YEAR_PATTERN (\\d{4}), it also matches digits like '²' or '①', which are not decimal digits (\\d).
+    """
+
+    return re.compile('[\\d' + ''.join(sorted(get_non_decimal_digits())) + ']{4}')
+
+
+def get_year(a_string):
+    """Single-pass equivalent of get_4_digit_substring(): returns the first run of 4 consecutive digits in a_string,
+    or None if there is no such run, without creating all 4-character substrings of a_string.
+    The strings with digits that are not decimal digits (get_non_decimal_digits()) are searched with
+    get_unicode_year_pattern(), all the others (e.g. ASCII strings, or '(2019– )') with the precompiled YEAR_PATTERN,
+    so that the digits are exactly those accepted by str.isdigit() in get_4_digit_substring().
+    """
+
+    if a_string.isascii() or get_non_decimal_digits().isdisjoint(a_string):
+        match = YEAR_PATTERN.search(a_string)
+    else:
+        match = get_unicode_year_pattern().search(a_string)
+    return match.group() if match else None
+
+
+def get_years(strings):
+    """Batch version of get_year(), e.g. for all year spans from a page; returns the list of get_year(s) for strings.
+    Unless some of the strings contain digits that are not decimal digits (checked once, for all the non-ASCII strings
+    joined together), YEAR_PATTERN is mapped over all the strings, saving a Python function call and a check
+    per string (a modest saving, about 10% in bench_years(), since the search itself dominates);
+    otherwise the pattern is chosen per string, as in get_year().
+    """
+
+    strings = list(strings)
+    non_decimal_digits = get_non_decimal_digits()
+    if non_decimal_digits.isdisjoint(''.join(filterfalse(str.isascii, strings))):
+        matches = map(YEAR_PATTERN.search, strings)
+    else:
+        year, unicode_year = YEAR_PATTERN.search, get_unicode_year_pattern().search
+        matches = [year(s) if non_decimal_digits.isdisjoint(s) else unicode_year(s) for s in strings]
+    return [match.group() if match else None for match in matches]
+
+
+def get_m_info(start_url: str, max_pages=1, workers=1, session=None, cache=None, parser=None, checkpoint=None):
     """
     Returns structured information about movies from a multi-page IMDb movie list.
     :param start_url: the url of the starting page of a multi-page IMDb movie list
     :param max_pages: the max number of pages to crawl
+    :param workers: the max number of pages fetched concurrently (see crawl())
+    :param session: the CrawlSession to fetch the pages with (get_session() by default)
+    :param cache: the ResponseCache to read the pages from whenever possible (e.g., get_cache(); no caching by default)
+    :param parser: the parser to use (DEFAULT_PARSER by default); only the tags in M_INFO_STRAINER are parsed
+    :param checkpoint: the CrawlCheckpoint to resume the crawl from and record the completed pages in (see iter_m_info())
     :return: a list of tuples of info-items about the movies from a multi-page IMDb movie list
     Creates and uses the following data:
     - h3_list - a list of all 'h3' tags from multiple IMDb pages
@@ -94,10 +759,14 @@ def get_m_info(start_url: str, max_pages=1):
     - complete_list - a list of 4-tuples of information about each movie from info_list and poster_list
     """
 
+    # Resumable crawls are done page by page, by iter_m_info()
+    if checkpoint is not None:
+        return list(iter_m_info(start_url, max_pages, workers, session, cache, parser, checkpoint))
+
     # Initialize h3_list and poster_list as empty lists, as well as the generator object (crawl(start_url, max_pages))
     h3_list = []
     poster_list = []
-    crawler = crawl(start_url, max_pages)
+    crawler = crawl(start_url, max_pages, workers, session, cache, parser, M_INFO_STRAINER)
 
     # In a while True loop, get the next soup from the generator and use it to populate h3_list and poster_list
     # by EXTENDing them with the relevant tags from the soup
@@ -115,17 +784,17 @@ def get_m_info(start_url: str, max_pages=1):
     # Repeat the following steps for each h3 in a for loop over h3_list:
     # Extract title from h3.a.text (strip() it in order to eliminate leading/trailing whitespace).
     # Extract year from <span class="lister-item-year text-muted unbold"> using h3.find(...).text,
-    # and filter it by get_4_digit_substring(year); set year to 'unknown' if get_4_digit_substring(year) returns None.
+    # and filter it by get_year(year) (a faster get_4_digit_substring(year)); set year to 'unknown' if it returns None.
     # Extract relative link from h3.a['href'] (make sure to lstrip('/') from it as well) and append it to BASE_URL.
     # Append (title, year, link) to info_list.
     info_list = []
     for h3 in h3_list:
         title = h3.a.text.strip()
         year = h3.find('span', {'class': "lister-item-year text-muted unbold"}).text
-        year = get_4_digit_substring(year)
+        year = get_year(year)
         year = year if year else 'unknown'
         link = BASE_URL + h3.a['href'].lstrip('/')
-        info_list.append((title, link, year))
+        info_list.append((title, year, link))
 
     # Initialize poster_link_list as an empty list.
     # In a for loop over all posters in poster_list, extract the poster link from poster.a.img['loadlate']
@@ -148,6 +817,54 @@ def get_m_info(start_url: str, max_pages=1):
     return complete_list
 
 
+def get_page_m_info(soup):
+    """Returns the list of (title, year, link, poster_link) tuples about the movies from a single page (soup)
+    of an IMDb movie list, extracted from its 'h3' tags and poster 'div' tags just like in get_m_info().
+    """
+
+    h3s = soup.find_all('h3')[:-1]
+    posters = soup.find_all('div', {'class': "lister-item-image ribbonize"})
+    years = get_years([h3.find('span', {'class': "lister-item-year text-muted unbold"}).text for h3 in h3s])
+    m_info = []
+    for h3, year, poster in zip(h3s, years, posters):
+        title = h3.a.text.strip()
+        link = BASE_URL + h3.a['href'].lstrip('/')
+        m_info.append((title, year if year else 'unknown', link, poster.a.img['loadlate']))
+    return m_info
+
+
+def iter_m_info(start_url: str, max_pages=1, workers=1, session=None, cache=None, parser=None, checkpoint=None):
+    """Generator version of get_m_info() (same parameters), yielding (title, year, link, poster_link) tuples.
+    Each soup yielded by crawl() is parsed as soon as it arrives (get_page_m_info()) and decomposed right after that,
+    so only the page at hand (or up to workers pages, with concurrent crawling) is kept in memory,
+    and the movies from the first page are available before the next pages are fetched.
+    If checkpoint (a CrawlCheckpoint of start_url) is passed, the movies from the pages completed in previous runs
+    are taken from it, only the missing pages are crawled, and each of them is recorded in it once it is parsed.
+    Only the pages that were fetched successfully are recorded: a page that failed (see check_status()) raises
+    requests.HTTPError before it is recorded, so the crawl stops there and a rerun fetches that page again.
+    """
+
+    if checkpoint is None:
+        for soup in crawl(start_url, max_pages, workers, session, cache, parser, M_INFO_STRAINER):
+            m_info = get_page_m_info(soup)
+            soup.decompose()
+            yield from m_info
+        return
+
+    missing_pages = checkpoint.missing_pages(max_pages)
+    soups = crawl(start_url, workers=workers, session=session, cache=cache, parser=parser,
+                  parse_only=M_INFO_STRAINER, pages=missing_pages)
+    for page in range(1, max_pages + 1):
+        if page not in missing_pages:
+            yield from checkpoint.pages[page]
+            continue
+        soup = next(soups)
+        m_info = get_page_m_info(soup)
+        soup.decompose()
+        checkpoint.record(page, m_info)
+        yield from m_info
+
+
 if __name__ == "__main__":
     # # Getting started
     # start_url = 'https://www.imdb.com/search/keyword/?keywords=rock-%27n%27-roll%2Crock-music&ref_=kw_ref_key' \
@@ -264,17 +981,97 @@ if __name__ == "__main__":
     #         break
     # print()
 
+    # # Test concurrent crawl() against a local stand-in for IMDb (testdata.imdb.FakeImdbServer);
+    # # with 0.5s latency per page, 5 pages take ~2.5s with workers=1 and ~0.5s with workers=5
+    # from testdata.imdb import FakeImdbServer
+    # with FakeImdbServer(pages=5, delay=0.5) as server:
+    #     for next_soup in crawl(server.start_url, 5, workers=5):
+    #         print(next_soup.find('h3').a.text)
+    # print()
+
+    # # Test CrawlSession - connections are reused across pages (keep-alive)
+    # from testdata.imdb import FakeImdbServer
+    # with FakeImdbServer(pages=10) as server, CrawlSession(pool_size=2) as session:
+    #     get_m_info(server.start_url, 10, workers=2, session=session)
+    #     print(session.requests_sent, session.connections_opened, session.connections_reused)
+    # print()
+
+    # # Test TokenBucket and AdaptiveConcurrency against a local stand-in for IMDb that fails 20% of the requests
+    # from testdata.imdb import FakeImdbServer
+    # with FakeImdbServer(pages=20, delay=0.1, error_rate=0.2) as server, \
+    #         CrawlSession(limiter=TokenBucket(rate=10), controller=AdaptiveConcurrency(max_limit=8)) as session:
+    #     for info in iter_m_info(server.start_url, 20, workers=8, session=session):
+    #         print(session.metrics)
+    # print()
+
+    # # Test offline replay (ReplaySource) of the pages saved with archive_pages()
+    # archive_pages(start_url, 3, compress=True)
+    # for info in get_m_info(start_url, 3, session=ReplaySource()):
+    #     print(info)
+    # print()
+
+    # # Test ResponseCache - the second crawl reads all pages from disk
+    # from testdata.imdb import FakeImdbServer
+    # with FakeImdbServer(pages=3) as server:
+    #     cache = ResponseCache(utility.get_data_dir() / 'test_cache', ttl=60)
+    #     get_m_info(server.start_url, 3, cache=cache)
+    #     get_m_info(server.start_url, 3, cache=cache)
+    #     print(cache.stats)
+    #     cache.clear()
+    # print()
+
     # # Test get_4_digit_substring()
     # print(get_4_digit_substring('sdfah1234rety'))
     # print(get_4_digit_substring('sdfah1234556rety'))
     # print(get_4_digit_substring('sdfah126rety'))
     # print()
 
+    # Test get_year() and get_years() against get_4_digit_substring() on random strings,
+    # including non-ASCII digits (superscript two, Arabic-Indic three, circled one)
+    import random
+    alphabet = '0123456789 (),a²٣①'
+    strings = [''.join(random.choices(alphabet, k=random.randint(0, 12))) for _ in range(100000)]
+    print(all(get_year(s) == get_4_digit_substring(s) for s in strings))
+    print(get_years(strings) == [get_4_digit_substring(s) for s in strings])
+    ascii_strings = [s for s in strings if s.isascii()]
+    print(get_years(ascii_strings) == [get_4_digit_substring(s) for s in ascii_strings])
+    print()
+
+    # Test resuming a crawl that died (CrawlCheckpoint) against a local stand-in for IMDb that goes down after
+    # two pages - the failed page 3 is not recorded, and the rerun (after the server recovered) fetches pages 3-5 only
+    from testdata.imdb import FakeImdbServer
+    with FakeImdbServer(pages=5) as server, CrawlSession(retries=1, backoff_factor=0.1) as session:
+        checkpoint = CrawlCheckpoint(server.start_url)
+        try:
+            for i, info in enumerate(iter_m_info(server.start_url, 5, session=session, checkpoint=checkpoint)):
+                if i == 2 * server.items_per_page - 1:
+                    server.error_rate = 1.0
+        except requests.HTTPError as error:
+            print(error)
+        print(checkpoint.missing_pages(5))
+        server.error_rate = 0.0
+        print(len(get_m_info(server.start_url, 5, session=session, checkpoint=CrawlCheckpoint(server.start_url))))
+        checkpoint.clear()
+    print()
+
     # Test get_m_info()
     for info in get_m_info(start_url, 3):
         print(info)
     print()
 
+    # # Test iter_m_info()
+    # for info in iter_m_info(start_url, 3):
+    #     print(info)
+    # print()
+
+    # # Test resumable crawls (CrawlCheckpoint) - the second get_m_info() fetches only pages 4 and 5
+    # checkpoint = CrawlCheckpoint(start_url)
+    # for info in iter_m_info(start_url, 3, checkpoint=checkpoint):
+    #     print(info)
+    # print(len(get_m_info(start_url, 5, checkpoint=checkpoint)))
+    # checkpoint.clear()
+    # print()
+
     """
     HTML tags with examples:
     https://www.tutorialstonight.com/html-tags-list-with-examples.php
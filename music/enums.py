@@ -33,3 +33,24 @@ class Tempo(Enum):
     SLOW = 1,
     MODERATE = 2,
     FAST = 3,
+
+
+# Compact codes of enum members (e.g. for columnar and binary storage): 0 stands for None (no member),
+# the members of each enum are coded 1, 2, ... in their definition order.
+
+ENUM_CODES = {member: code for enum in (Vocals, Instrument, Tempo) for code, member in enumerate(enum, 1)}
+ENUM_MEMBERS = {enum: (None, *enum) for enum in (Vocals, Instrument, Tempo)}
+
+
+def enum_code(member):
+    """Returns the compact code of an enum member (0 for None).
+    """
+
+    return ENUM_CODES[member] if member is not None else 0
+
+
+def enum_member(enum, code):
+    """Returns the member of enum with the compact code (None for 0); the inverse of enum_code().
+    """
+
+    return ENUM_MEMBERS[enum][code]
@@ -2,13 +2,15 @@
 It includes a list of Song objects and the dates when the playlist was created and completed.
 """
 import pickle
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date, datetime, time
 from pathlib import Path
+import os
 import sys
 from pickle import *
 import json
 
-from music.song import Song, song_py_to_json, song_json_to_py
+from music.song import Song, song_json_to_py, song_to_record, UNPLUGGED
 # from util.utility import format_date
 # from settings import PREFERRED_DATE_FORMAT
 from settings import *
@@ -42,7 +44,11 @@ class Playlist:
         return '\n'.join([n, s, from_to])
 
     def __eq__(self, other):
-        return self.__dict__ == other.__dict__ if type(self) is type(other) else False
+        # return self.__dict__ == other.__dict__ if type(self) is type(other) else False
+        if type(self) is not type(other):
+            return False
+        return self.name == other.name and self.created == other.created and self.completed == other.completed \
+            and self.songs == other.songs
 
     @staticmethod
     def is_date_valid(d):
@@ -66,6 +72,9 @@ class Playlist:
     # Alternative constructor
     @classmethod
     def from_playlist_str(cls, playlist_str):
+        """Inverted __str__() method; parses all the songs at once (PlaylistView parses them lazily).
+        """
+
         name, songs, created, completed = Playlist.parse_playlist_str(playlist_str)
         return cls(name, *songs, created=created, completed=completed)
 
@@ -76,19 +85,73 @@ class Playlist:
         It is often sufficient to just return self in __iter__(),
         if the iterator counter such as self.__i is introduced and initialized in __init__().
         Alternatively, the iterator counter (self.__i) is introduced and initialized  here.
+
+        However, an iterator counter in the object itself is shared by all the iterations over the object,
+        so nested loops or several threads iterating over the same playlist would corrupt each other's iterations.
+        Hence this method returns a new, independent iterator over the songs on each call, without __next__();
+        the tuple iterator (implemented in C) also avoids the len() and indexing in each __next__() call.
         """
 
         # return self               # sufficient if the iterator counter is introduced and initialized in __init__()
-        self.__i = 0
-        return self
+        return iter(self.songs)
+
+
+class IndexedPlaylist(Playlist):
+    """A playlist that also maintains an index of its songs (title -> positions of the songs with that title),
+    so that membership tests (in), position lookups (index()) and dedup take O(1) time per song instead of linear scans.
+    The index is rebuilt whenever the songs are set (it is a property); merge() combines many playlists into one.
+    """
+
+    @property
+    def songs(self):
+        return self.__songs
+
+    @songs.setter
+    def songs(self, songs):
+        self.__songs = tuple(songs)
+        self.__index = {}
+        for position, song in enumerate(self.__songs):
+            self.__index.setdefault(song.title, []).append(position)
+
+    def positions(self, title):
+        """Returns the positions of the songs with the title (an empty list if there are none).
+        """
+
+        return list(self.__index.get(title, ()))
+
+    def __contains__(self, song):
+        if not isinstance(song, Song):              # (only songs are indexed, and only songs can be in the playlist)
+            return False
+        return any(self.__songs[position] == song for position in self.__index.get(song.title, ()))
 
-    def __next__(self):
-        if self.__i < len(self.songs):
-            s = self.songs[self.__i]
-            self.__i += 1
-            return s
-        else:
-            raise StopIteration
+    def index(self, song):
+        """Returns the position of the first occurrence of the song; raises ValueError if it is not in the playlist.
+        """
+
+        if isinstance(song, Song):
+            for position in self.__index.get(song.title, ()):
+                if self.__songs[position] == song:
+                    return position
+        raise ValueError(f'{song!r} is not in the playlist')
+
+    def dedup(self):
+        """Returns a new playlist of the same class, with the same name and dates,
+        keeping just the first occurrence of each song.
+        """
+
+        return type(self)(self.name, *dict.fromkeys(self.__songs), created=self.created, completed=self.completed)
+
+    @classmethod
+    def merge(cls, name, *playlists):
+        """Returns a new indexed playlist with the songs of all the playlists, in order, each song just once,
+        created when the first of the playlists was created and completed when the last of them was completed.
+        """
+
+        songs = dict.fromkeys(song for playlist in playlists for song in playlist.songs)
+        if not playlists:
+            return cls(name)
+        return cls(name, *songs, created=min(playlist.created for playlist in playlists),
+                   completed=max(playlist.completed for playlist in playlists))
 
 
 def next_song(playlist):
@@ -103,6 +166,71 @@ def next_song(playlist):
         print('Yeah!')
 
 
+class PlaylistView:
+    """A lazy view of a playlist string, in the format generated by Playlist.__str__().
+    The header (the name and the dates) is parsed immediately, but the songs are not split and parsed
+    until they are needed, and then one at a time (songs()), so getting the name or the dates of a playlist
+    with many songs takes time that does not depend on the number of songs.
+    """
+
+    def __init__(self, playlist_str):
+        first = playlist_str.find('\n')
+        last = playlist_str.rfind('\n')
+        if first == last:
+            raise ValueError('expected a playlist string in the format generated by Playlist.__str__()')
+        self.__playlist_str = playlist_str
+        self.__songs_start, self.__songs_end = first + 1, last
+        self.name = playlist_str[:first]
+        self.created, self.completed = [datetime.strptime(d, PREFERRED_DATE_FORMAT).date()
+                                        for d in playlist_str[last + 1:].split(' - ')]
+
+    def __str__(self):
+        return self.__playlist_str
+
+    def __is_empty(self):
+        return self.__playlist_str[self.__songs_start:self.__songs_end] == '(empty)'
+
+    def __len__(self):
+        if self.__is_empty():
+            return 0
+        return self.__playlist_str.count('; ', self.__songs_start, self.__songs_end) + 1
+
+    def songs(self):
+        """Generates the songs of the playlist, finding and parsing (Song.from_str()) one song at a time.
+        """
+
+        if self.__is_empty():
+            return
+        text, start, end = self.__playlist_str, self.__songs_start, self.__songs_end
+        while (separator := text.find('; ', start, end)) >= 0:
+            yield Song.from_str(text[start:separator])
+            start = separator + 2
+        yield Song.from_str(text[start:end])
+
+    def __iter__(self):
+        return self.songs()
+
+    def song_columns(self):
+        """Parses all the songs at once, into two columns: the list of their (interned) titles
+        and the list of their is_unplugged flags (as Song.from_str() would parse them).
+        """
+
+        if self.__is_empty():
+            return [], []
+        strings = self.__playlist_str[self.__songs_start:self.__songs_end].split('; ')
+        intern, n = sys.intern, len(UNPLUGGED)
+        unplugged = [s.endswith(UNPLUGGED) for s in strings]
+        titles = [intern(s[:-n] if u else s) for s, u in zip(strings, unplugged)]
+        return titles, unplugged
+
+    def to_playlist(self):
+        """Returns the Playlist object, with all the songs parsed (the same as Playlist.from_playlist_str()).
+        """
+
+        return Playlist(self.name, *Song.from_columns(*self.song_columns()), created=self.created,
+                        completed=self.completed)
+
+
 class PlaylistError(Exception):
     """Base class for exceptions in this module.
     """
@@ -126,39 +254,158 @@ class PlaylistEncoder(json.JSONEncoder):
     def default(self, playlist):
         # recommendation: always use double quotes with JSON
 
-        pass
+        return playlist_py_to_json(playlist)
 
 
 def playlist_py_to_json(playlist):
     """JSON encoder for Playlist objects (default= parameter in json.dumps()).
+    The songs are nested in the playlist's JSON as an array of compact records (song_to_record()),
+    so that the whole document is encoded in a single pass (they used to be encoded separately, by another json.dumps(),
+    and nested as an escaped JSON string).
     """
 
     if isinstance(playlist, Playlist):
-        d = playlist.__dict__.copy()
-        d["songs"] = json.dumps(playlist.songs, default=song_py_to_json)
-        d["created"] = date_py_to_json(playlist.created)
-        d["completed"] = date_py_to_json(playlist.completed)
-        return {"__Playlist__": d}
+        return {"__Playlist__": playlist_to_record(playlist)}
     raise TypeError('not a Playlist object')
 
 
 def playlist_json_to_py(playlist_json):
     """JSON decoder for Playlist objects (object_hook= parameter in json.loads()).
+    Decodes both the nested songs made by playlist_py_to_json() and the legacy form,
+    in which the songs are a JSON string (of {"__Song__": ...} objects) that has to be parsed again.
     """
 
     # The songs field is specified as *songs in Playlist.__init__(),
     # make sure to use tuple(json.loads(<songs in playlist_json>))
 
     if "__Playlist__" in playlist_json:
-        p = Playlist('')
         d = playlist_json["__Playlist__"]
-        p.songs = tuple(json.loads(d["songs"], object_hook=song_json_to_py))
-        p.created = date_json_to_py(d["created"])
-        p.completed = date_json_to_py(d["completed"])
-        return p
+        if isinstance(d["songs"], str):                     # legacy form
+            d = dict(d, songs=json.loads(d["songs"], object_hook=song_json_to_py))
+        return playlist_from_record(d)
     return playlist_json
 
 
+def playlist_to_record(playlist):
+    """Returns the playlist as a JSON-serializable dict, with the songs as compact records (song_to_record()).
+    """
+
+    return {"name": playlist.name, "songs": [song_to_record(song) for song in playlist.songs],
+            "created": date_py_to_json(playlist.created), "completed": date_py_to_json(playlist.completed)}
+
+
+def playlist_from_record(record):
+    """Returns the playlist described by a dict made by playlist_to_record() (the inverse of it).
+    The songs can also be Song objects already (e.g. decoded from {"__Song__": ...} objects by an object_hook).
+    """
+
+    songs = record["songs"]
+    if songs and not isinstance(songs[0], Song):
+        songs = Song.from_rows(songs)
+    return Playlist(record.get("name", ''), *songs,
+                    created=date_json_to_py(record["created"]), completed=date_json_to_py(record["completed"]))
+
+
+def write_playlists_ndjson(playlists, file='playlists.ndjson'):
+    """Writes playlists (any iterable of playlists, e.g. a generator) to an NDJSON file, one playlist per line,
+    streaming them without building the whole document in memory. A relative file is taken from get_data_dir().
+    Returns the number of playlists written.
+    """
+
+    return write_ndjson(get_data_dir() / file, playlists, playlist_to_record)
+
+
+def read_playlists_ndjson(file='playlists.ndjson'):
+    """Generates the playlists from an NDJSON file written by write_playlists_ndjson(), one line at a time.
+    """
+
+    return read_ndjson(get_data_dir() / file, playlist_from_record)
+
+
+def write_playlists_str(playlists, file='playlists.txt'):
+    """Writes playlists (any iterable of playlists) to a text file, as the lines of their Playlist.__str__() strings,
+    one playlist after another. A relative file is taken from get_data_dir(). Returns the number of playlists written.
+    """
+
+    path = get_data_dir() / file
+    path.parent.mkdir(parents=True, exist_ok=True)
+    n = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for playlist in playlists:
+            f.write(str(playlist))
+            f.write('\n')
+            n += 1
+    return n
+
+
+def read_playlists_str(file='playlists.txt'):
+    """Generates PlaylistView objects from a text file written by write_playlists_str(), reading the file
+    three lines (one playlist) at a time; the songs of each playlist are parsed only if the view's songs are used.
+    """
+
+    with open(get_data_dir() / file, 'r', encoding='utf-8') as f:
+        for name, songs, dates in zip(f, f, f):
+            yield PlaylistView(name + songs + dates.rstrip('\n'))
+
+
+def playlist_files(files='*.txt'):
+    """Returns the sorted list of the paths of the playlist text files given by files, relative to get_data_dir():
+    either a directory (all the files in it) or a glob pattern (e.g. 'exports/**/*.txt').
+    """
+
+    path = get_data_dir() / files
+    paths = path.iterdir() if path.is_dir() else get_data_dir().glob(str(files))
+    return sorted(p for p in paths if p.is_file())
+
+
+def parse_playlist_files(paths):
+    """Returns the list of the playlists parsed from the text files (written by write_playlists_str()) in paths,
+    in order (file by file).
+    """
+
+    return [view.to_playlist() for path in paths for view in read_playlists_str(path)]
+
+
+def parse_playlist_columns(paths):
+    """Like parse_playlist_files(), but returns each playlist as a tuple (name, created, completed, titles, unplugged)
+    (see PlaylistView.song_columns()) instead of a Playlist object; the unit of work of the parallel loaders,
+    since such tuples are much cheaper to send between processes than Song objects.
+    """
+
+    return [(view.name, view.created, view.completed, *view.song_columns())
+            for path in paths for view in read_playlists_str(path)]
+
+
+def iter_playlist_files(files='*.txt', workers=None, chunk_size=8):
+    """Generates the playlists from many text files (see playlist_files() and write_playlists_str()),
+    parsing the files in parallel, in chunks of chunk_size files, in a pool of workers processes
+    (os.cpu_count() if workers is None; a single worker parses the files in this process, without a pool).
+    The workers parse the songs into columns (parse_playlist_columns()), from which the songs are built
+    in bulk (Song.from_columns()) in this process.
+    The playlists are generated in a deterministic order (the files sorted by path, the playlists in file order),
+    as soon as the chunks they belong to are parsed, regardless of the number of workers.
+    """
+
+    paths = playlist_files(files)
+    chunks = [paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size)]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            yield from parse_playlist_files(chunk)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for columns in executor.map(parse_playlist_columns, chunks):
+            for name, created, completed, titles, unplugged in columns:
+                yield Playlist(name, *Song.from_columns(titles, unplugged), created=created, completed=completed)
+
+
+def load_playlist_files(files='*.txt', workers=None, chunk_size=8):
+    """Returns the list of the playlists from many text files, parsed in parallel (see iter_playlist_files()).
+    """
+
+    return list(iter_playlist_files(files, workers, chunk_size))
+
+
 if __name__ == "__main__":
 
     from testdata.songs import *
@@ -187,6 +434,32 @@ if __name__ == "__main__":
     print(pl == Playlist.from_playlist_str(pls))
     print()
 
+    # Check the indexed playlist (IndexedPlaylist)
+    ipl = IndexedPlaylist('My songs', *[across_the_universe, imagine, love, imagine], created=date(2019, 2, 4))
+    print(imagine in ipl, Song('Love') in ipl)
+    print(ipl.index(love), ipl.positions('Imagine'))
+    print(ipl.dedup())
+    print(IndexedPlaylist.merge('All my songs', ipl, pl))
+    print()
+
+    # Check the lazy view of a playlist string (PlaylistView)
+    plv = PlaylistView(pls)
+    print(plv.name, plv.created, plv.completed, len(plv))
+    print(next(plv.songs()))
+    print(plv.to_playlist() == pl)
+    print()
+
+    # # Many text exports (in the data directory), loaded in parallel
+    # for i in range(4):
+    #     write_playlists_str([pl] * 3, f'exports/playlists-{i}.txt')
+    # print(len(load_playlist_files('exports', workers=2, chunk_size=1)))
+    # print()
+
+    # # Text export of many playlists, read back lazily
+    # print(write_playlists_str([pl, pl]))
+    # print([v.name for v in read_playlists_str()])
+    # print()
+
     # Check the iterator
     i = iter(pl)
     while True:
@@ -196,11 +469,15 @@ if __name__ == "__main__":
             break
     print()
 
-    # Repeated attempt to run the iterator fails, because the iterator is exhausted
+    # Repeated attempt to run the iterator succeeds, because each iter() call returns a new iterator
     i = iter(pl)
     print(next(i))
     print()
 
+    # Nested iterations over the same playlist are independent of each other
+    print(len([(s1, s2) for s1 in pl for s2 in pl]))
+    print()
+
     # # Demonstrate generators
     # next_s = next_song(pl)
     # while True:
@@ -284,6 +561,8 @@ if __name__ == "__main__":
     # print()
 
     # Demonstrate writing to a binary file - pickle.dump()
+    # (pickle files must not be loaded from untrusted sources and are loaded whole;
+    # see music.snapshot for a binary format of playlists that is data-only and memory-mapped)
     # file = get_data_dir() / 'songs.binary'
     # with open(file, 'wb') as f:
     #     pickle.dump(songs, f)
@@ -313,4 +592,10 @@ if __name__ == "__main__":
         print(p)
     print()
 
+    # # Streaming playlists to/from an NDJSON file in the data directory
+    # print(write_playlists_ndjson([pl, pl]))
+    # for p in read_playlists_ndjson():
+    #     print(p)
+    # print()
+
 
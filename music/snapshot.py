@@ -0,0 +1,185 @@
+"""Binary snapshots of playlists.
+A compact, memory-mapped file format for large libraries of playlists, safe to load from untrusted sources
+(unlike pickle, it contains only data) and decoded lazily, one playlist or song at a time.
+"""
+
+from datetime import date
+import mmap
+import struct
+
+from music.playlist import Playlist
+from music.song import *
+from util.utility import get_data_dir
+
+
+MAGIC = b'PLSNAP\r\n'
+VERSION = 1
+
+# All numbers are little-endian; the offsets are from the beginning of the file.
+# header: magic, version, number of playlists, number of songs, number of strings,
+#         offsets of the string index, the string data, the playlist records and the song records
+HEADER = struct.Struct('<8sIIIIQQQQ')
+# string index: number of strings + 1 offsets (into the string data) of the UTF-8 encoded strings, back to back
+STRING_OFFSET = struct.Struct('<Q')
+# playlist record: name (string number), first song (song number), number of songs, created, completed (ordinals)
+PLAYLIST = struct.Struct('<IIIII')
+# song record: title (string number), kind (index in SONG_CLASSES), is_unplugged, tempo, instrument (enum codes)
+SONG = struct.Struct('<IBBBB')
+
+
+def write_snapshot(playlists, file='playlists.snapshot'):
+    """Writes playlists (any iterable of playlists) to a binary snapshot file, laid out as:
+    header | string index | string data | playlist records | song records.
+    The strings (playlist names, song titles) are stored only once each, in the string table,
+    and the records refer to them by number; the records have fixed widths (PLAYLIST.size, SONG.size bytes).
+    A relative file is taken from get_data_dir(). Returns the number of playlists written.
+    """
+
+    strings = {}                                # string -> number (dicts keep the insertion order)
+    playlist_records = bytearray()
+    song_records = bytearray()
+    n_songs = 0
+    n_playlists = 0
+    for playlist in playlists:
+        playlist_records += PLAYLIST.pack(strings.setdefault(playlist.name, len(strings)), n_songs,
+                                          len(playlist.songs), playlist.created.toordinal(),
+                                          playlist.completed.toordinal())
+        for song in playlist.songs:
+            song_records += SONG.pack(strings.setdefault(song.title, len(strings)), KIND_CODES[type(song)],
+                                      bool(song.is_unplugged), enum_code(getattr(song, 'tempo', None)),
+                                      enum_code(getattr(song, 'instrument', None)))
+        n_songs += len(playlist.songs)
+        n_playlists += 1
+
+    encoded = [string.encode('utf-8') for string in strings]
+    offsets = [0]
+    for string in encoded:
+        offsets.append(offsets[-1] + len(string))
+    string_index_offset = HEADER.size
+    string_data_offset = string_index_offset + STRING_OFFSET.size * len(offsets)
+    playlists_offset = string_data_offset + offsets[-1]
+    songs_offset = playlists_offset + len(playlist_records)
+    with open(get_data_dir() / file, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, n_playlists, n_songs, len(strings),
+                            string_index_offset, string_data_offset, playlists_offset, songs_offset))
+        f.write(struct.pack(f'<{len(offsets)}Q', *offsets))
+        f.writelines(encoded)
+        f.write(playlist_records)
+        f.write(song_records)
+    return n_playlists
+
+
+class PlaylistSnapshot:
+    """A library of playlists in a binary snapshot file made by write_snapshot(), memory-mapped.
+    Opening it reads just the header (in O(1) time, regardless of the number of playlists); the playlists, their songs,
+    names and dates are decoded from the mapped file only when accessed, and are not kept (each access decodes again).
+    Use it as a context manager (or call close()):
+        with PlaylistSnapshot('playlists.snapshot') as library:
+            print(library[12345])
+    """
+
+    def __init__(self, file='playlists.snapshot'):
+        with open(get_data_dir() / file, 'rb') as f:
+            self.__mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.__mm.size() < HEADER.size or self.__mm[:len(MAGIC)] != MAGIC:
+            self.__mm.close()
+            raise ValueError(f'not a playlist snapshot: {file}')
+        magic, version, self.__n_playlists, self.__n_songs, self.__n_strings, self.__string_index, \
+            self.__string_data, self.__playlists, self.__songs = HEADER.unpack_from(self.__mm)
+        if version != VERSION:
+            self.__mm.close()
+            raise ValueError(f'unsupported playlist snapshot version: {version}')
+
+    def close(self):
+        self.__mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        return self.__n_playlists
+
+    @property
+    def song_count(self):
+        return self.__n_songs
+
+    def string(self, number):
+        """Decodes the string with the number from the string table.
+        """
+
+        start, end = struct.unpack_from('<QQ', self.__mm, self.__string_index + STRING_OFFSET.size * number)
+        return str(self.__mm[self.__string_data + start:self.__string_data + end], 'utf-8')
+
+    def __record(self, i):
+        if not -self.__n_playlists <= i < self.__n_playlists:
+            raise IndexError('playlist index out of range')
+        return PLAYLIST.unpack_from(self.__mm, self.__playlists + PLAYLIST.size * (i % self.__n_playlists))
+
+    def name(self, i):
+        return self.string(self.__record(i)[0])
+
+    def dates(self, i):
+        """Returns the dates when the i-th playlist was created and completed.
+        """
+
+        created, completed = self.__record(i)[3:]
+        return date.fromordinal(created), date.fromordinal(completed)
+
+    def songs(self, i):
+        """Generates the songs of the i-th playlist, decoding them one at a time.
+        """
+
+        first, count = self.__record(i)[1:3]
+        for offset in range(self.__songs + SONG.size * first, self.__songs + SONG.size * (first + count), SONG.size):
+            title, kind, is_unplugged, tempo, instrument = SONG.unpack_from(self.__mm, offset)
+            yield song_from_record(kind, self.string(title), bool(is_unplugged), tempo, instrument)
+
+    def __getitem__(self, i):
+        """Decodes the i-th playlist (a Playlist object, with all its songs, built in bulk by Song.from_rows()).
+        """
+
+        name, first, count, created, completed = self.__record(i)
+        start = self.__songs + SONG.size * first
+        songs = Song.from_rows([(kind, self.string(title), bool(is_unplugged), tempo, instrument)
+                                for title, kind, is_unplugged, tempo, instrument
+                                in SONG.iter_unpack(self.__mm[start:start + SONG.size * count])])
+        return Playlist(self.string(name), *songs,
+                        created=date.fromordinal(created), completed=date.fromordinal(completed))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def find(self, name):
+        """Returns the indices of the playlists with the name (decoding just the names).
+        """
+
+        return [i for i in range(len(self)) if self.name(i) == name]
+
+
+if __name__ == "__main__":
+
+    from testdata.songs import *
+
+    # Write a snapshot of some playlists (to the data directory)
+    playlists = [Playlist('My songs', *[across_the_universe, imagine, happiness_is_a_warm_gun, love],
+                          created=date(2019, 2, 4), completed=date(2020, 3, 5)),
+                 Playlist('Ballads', Ballad(title='Patience', is_unplugged=True), PianoBallad(title='Hey Jude'),
+                          created=date(2021, 6, 7), completed=date(2021, 6, 7)),
+                 Playlist('Empty', created=date(2022, 1, 1), completed=date(2022, 1, 1))]
+    print(write_snapshot(playlists))
+    print()
+
+    # Open it and decode just what is needed
+    with PlaylistSnapshot() as library:
+        print(len(library), library.song_count)
+        print(library.name(1))
+        print(library.dates(1))
+        print([str(song) for song in library.songs(1)])
+        print(library[0])
+        print(list(library) == playlists)
+        print(library.find('Empty'))
+    print()
@@ -4,7 +4,32 @@
 
 # from util import utility
 from music.enums import *
+from util.utility import gc_paused, get_data_dir, write_ndjson, read_ndjson
+from functools import lru_cache
 import json
+import sys
+
+
+UNPLUGGED = ' (unplugged)'
+UNPLUGGED_CACHE_SIZE = 8192                         # the max number of titles whose unplugged form is cached
+
+
+def intern_title(title):
+    """Returns title interned (sys.intern()), so that equal titles share a single str object, if it is a str;
+    other titles (e.g. None, or objects of str subclasses, which cannot be interned) are returned as they are.
+    """
+
+    return sys.intern(title) if type(title) is str else title
+
+
+@lru_cache(maxsize=UNPLUGGED_CACHE_SIZE)
+def unplugged_title(title):
+    """Returns the unplugged form of title, title + ' (unplugged)', used by Song.__str__().
+    The forms of the most recently used titles are cached, so that printing the same unplugged songs again and again
+    (e.g. in thousands of playlists) reuses the same str objects, while the cache itself stays bounded.
+    """
+
+    return title + UNPLUGGED
 
 
 class Song:
@@ -17,11 +42,27 @@ class Song:
     - __init__()
     - __str__()
     - __eq__(self, other) is the equivalent of Java equals() and should be overridden in classes
+    - __hash__() must be consistent with __eq__() (equal objects have equal hashes) for objects used in sets and dicts
     - __dict__ attribute of all objects
+    - __slots__ - fixed data fields stored in the object itself instead of in its __dict__
     - data fields (instance variables)
     - methods - calling them by self.<method>(...) from the same class where they are defined
+
+    The data fields are slots, to keep songs small in large catalogs (there is no per-object __dict__,
+    so new data fields cannot be added to Song objects on the fly).
+    The slots for the fields of the subclasses (tempo, instrument) are declared here as well, because Python cannot
+    combine two base classes that both add slots (as PianoBallad(Ballad, PianoSong) would require);
+    they remain unset (and raise AttributeError on access) in the objects that do not use them.
+
+    Songs are compared (==, <,...) and hashed by their comparison key (_key()): (kind, title, is_unplugged, tempo,
+    instrument), with the class as its kind - (<kind code>,), or (len(SONG_CLASSES), <module>, <qualified name>)
+    for the classes that are not registered - and the enums as their codes (0 if not set). The key of a song
+    of a registered class is computed once and cached in the song; the setters of all the data fields (properties)
+    invalidate it. The cached key is not pickled (or copied) with the song.
     """
 
+    __slots__ = ('__title', '__is_unplugged', '__tempo', '__instrument', '__key')
+
     def __init__(self, title, is_unplugged=False):
         self.title = title
         self.is_unplugged = is_unplugged
@@ -44,18 +85,116 @@ class Song:
 
     @title.setter
     def title(self, title):
-        self.__title = title
+        self.__title = intern_title(title)          # equal titles (e.g. read from files) share a single str object
+        self.__key = None
+
+    @property
+    def is_unplugged(self):
+        return self.__is_unplugged
+
+    @is_unplugged.setter
+    def is_unplugged(self, is_unplugged):
+        self.__is_unplugged = is_unplugged
+        self.__key = None
+
+    @property
+    def tempo(self):
+        return self.__tempo
+
+    @tempo.setter
+    def tempo(self, tempo):
+        self.__tempo = tempo
+        self.__key = None
+
+    @property
+    def instrument(self):
+        return self.__instrument
+
+    @instrument.setter
+    def instrument(self, instrument):
+        self.__instrument = instrument
+        self.__key = None
 
     # Add an immutable property (no setter for it) - just return self; prints as __str__().
 
+    def _fields(self):
+        """Returns the data fields of the song as a dict, just like __dict__ did before the slots were introduced
+        (the slots that are set, with the 'private' title as _Song__title).
+        """
+
+        return {name: getattr(self, name) for name in FIELD_NAMES if hasattr(self, name)}
+
+    def _key(self):
+        """Returns the comparison key of the song, computing it only if it is not cached (or has been invalidated).
+        """
+
+        try:
+            key = self.__key
+        except AttributeError:                      # songs created without __init__() (e.g. by the bulk decoders)
+            key = None
+        if key is None:
+            cls = type(self)
+            code = KIND_CODES.get(cls)
+            # Classes not registered (no kind code) sort after all the registered ones, by their full names
+            kind = (code,) if code is not None else (len(SONG_CLASSES), cls.__module__, cls.__qualname__)
+            key = (kind, self.__title, self.__is_unplugged,
+                   ENUM_CODES.get(getattr(self, '_Song__tempo', None), 0),
+                   ENUM_CODES.get(getattr(self, '_Song__instrument', None), 0))
+            if code is not None:                    # (the kind of the others changes as classes are registered)
+                self.__key = key
+        return key
+
+    def __getstate__(self):
+        """Returns the state of the song for pickle and copy: (None, <the slots that are set>), without the cached key.
+        """
+
+        return None, {name: getattr(self, name) for name in STATE_SLOTS if hasattr(self, name)}
+
+    def __setstate__(self, state):
+        """Restores the state made by __getstate__() (or by the default of object, with the key, in older pickles),
+        leaving the comparison key to be computed again.
+        """
+
+        for name, value in state[1].items():
+            if name != '_Song__key':
+                object.__setattr__(self, name, value)
+        self.__key = None
+
     def __str__(self):
-        return self.title + ' (unplugged)' if self.is_unplugged else self.title
+        # return self.title + ' (unplugged)' if self.is_unplugged else self.title
+        return unplugged_title(self.__title) if self.__is_unplugged else self.__title
 
     def __eq__(self, other):
-        isi = isinstance(other, Song)
-        t = self.title == other.title
-        u = self.is_unplugged == other.is_unplugged
-        return isi and t and u
+        # isi = isinstance(other, Song)
+        # if not isi:
+        #     return NotImplemented
+        # t = self.title == other.title
+        # u = self.is_unplugged == other.is_unplugged
+        # return isi and t and u
+
+        # The key includes the class, so this also works for the subclasses
+        # (which used to compare their __dict__s, i.e. _fields(), if type(self) is type(other))
+        return self._key() == other._key() if isinstance(other, Song) else NotImplemented
+
+    def __lt__(self, other):
+        return self._key() < other._key() if isinstance(other, Song) else NotImplemented
+
+    def __le__(self, other):
+        return self._key() <= other._key() if isinstance(other, Song) else NotImplemented
+
+    def __gt__(self, other):
+        return self._key() > other._key() if isinstance(other, Song) else NotImplemented
+
+    def __ge__(self, other):
+        return self._key() >= other._key() if isinstance(other, Song) else NotImplemented
+
+    def __hash__(self):
+        """Songs that are equal have equal comparison keys, so the hash is computed from the key, without the kind
+        (which changes when a class is registered, see _key()); songs of different classes are still unequal.
+        Hence songs should not be changed while in sets or dicts.
+        """
+
+        return hash(self._key()[1:])
 
     def play(self, artist, *args, **kwargs):
         """Assumes that artist, *args (e.g. expressions of gratitude) and kwargs.values() (e.g. messages) are strings.
@@ -83,10 +222,93 @@ class Song:
         """
 
         # return self.title + ' (unplugged)' if self.is_unplugged else self.title
-        t = song_string.split(' (unplugged)')[0]
-        u = True if song_string.endswith(' (unplugged)') else False
+        # t = song_string.split(' (unplugged)')[0]
+        # u = True if song_string.endswith(' (unplugged)') else False
+        u = song_string.endswith(UNPLUGGED)
+        t = song_string[:-len(UNPLUGGED)] if u else song_string     # the title setter interns it
         return cls(t, u)
 
+    # Bulk alternative constructors
+    RECORD_ARGS = ('title', 'is_unplugged')         # the arguments of __init__(), in the order used by from_records()
+    RECORD_DEFAULTS = (False,)                      # the defaults of RECORD_ARGS[1:]
+
+    @classmethod
+    def from_records(cls, records):
+        """Returns the list of the songs of this class built from records, tuples of the arguments of the constructor
+        in the order of cls.RECORD_ARGS (e.g. (title, is_unplugged, tempo) for Ballad, with enum members);
+        the trailing arguments can be omitted and then take the constructor's defaults (cls.RECORD_DEFAULTS).
+        The songs are the same as those made by the constructor, but they are built in a single pass that sets
+        the slots directly, instead of running the __init__() chain along the MRO (with **kwargs packing at each level)
+        and the property setters for each song (with the garbage collector paused, see gc_paused()).
+        """
+
+        args, defaults = cls.RECORD_ARGS, cls.RECORD_DEFAULTS
+        n = len(args)
+        tempo_at = args.index('tempo') if 'tempo' in args else 0
+        instrument_at = args.index('instrument') if 'instrument' in args else 0
+        new = object.__new__
+        intern = intern_title
+        songs = []
+        append = songs.append
+        with gc_paused():
+            for record in records:
+                if len(record) != n:
+                    if not 1 <= len(record) <= n:
+                        raise TypeError(f'{cls.__name__} record must have 1 to {n} items: {record!r}')
+                    record = (*record, *defaults[len(record) - 1:])
+                song = new(cls)
+                song.__title = intern(record[0])
+                song.__is_unplugged = record[1]
+                if tempo_at:
+                    song.__tempo = record[tempo_at]
+                if instrument_at:
+                    song.__instrument = record[instrument_at]
+                song.__key = None
+                append(song)
+        return songs
+
+    @classmethod
+    def from_columns(cls, *columns):
+        """Like from_records(), but with the arguments of the constructor as columns (one iterable per argument).
+        """
+
+        return cls.from_records(zip(*columns))
+
+    @staticmethod
+    def from_row(kind, title, is_unplugged, tempo, instrument):
+        """Returns the song described by a single row (kind, title, is_unplugged, tempo, instrument) in the format of
+        song_to_record(), without calling __init__() of its class (see from_rows()).
+        Unlike the bulk factories, it does not pause the garbage collector, so it is cheap for a single song.
+        """
+
+        song = object.__new__(SONG_CLASSES[kind])
+        song.__title = intern_title(title)
+        song.__is_unplugged = is_unplugged
+        if tempo:
+            song.__tempo = ENUM_MEMBERS[Tempo][tempo]
+        if instrument:
+            song.__instrument = ENUM_MEMBERS[Instrument][instrument]
+        song.__key = None
+        return song
+
+    @staticmethod
+    def from_rows(rows):
+        """Returns the list of the songs (of any classes in the hierarchy) described by rows in the format of
+        song_to_record(): (kind, title, is_unplugged, tempo, instrument), with the kind code of the class
+        and the compact codes of the enums (0 if not set, in which case the field is left unset, as it was).
+        Like from_records(), it builds all the songs in a single pass (from_row()), without calling __init__()
+        and with the garbage collector paused.
+        """
+
+        from_row = Song.from_row
+        with gc_paused():
+            return [from_row(*row) for row in rows]
+
+
+FIELD_NAMES = ('_Song__title', 'is_unplugged', 'tempo', 'instrument')      # the data fields, as attribute names
+STATE_SLOTS = ('_Song__title', '_Song__is_unplugged', '_Song__tempo', '_Song__instrument')    # pickled by songs
+ENUM_FIELDS = {'tempo': Tempo, 'instrument': Instrument}                    # the fields encoded as enum codes
+
 
 class SongEncoder(json.JSONEncoder):
     """JSON encoder for Song objects (cls= parameter in json.dumps()).
@@ -101,16 +323,30 @@ class SongEncoder(json.JSONEncoder):
 
 def song_py_to_json(song):
     """JSON encoder for Song objects (default= parameter in json.dumps()).
+    The song is tagged with its class (e.g. {"__Ballad__": {...}}, see SONG_TAGS), and its enum fields (tempo,
+    instrument) are encoded as compact codes (enum_code()), so that songs of all the classes in the hierarchy
+    can be encoded and decoded back to the same classes.
     """
 
     # recommendation: always use double quotes with JSON
-    if isinstance(song, Song):
-        return {"__Song__": song.__dict__}
-    raise TypeError('expected Song object')
+    tag = CLASS_TAGS.get(type(song))
+    if tag is None:
+        if isinstance(song, Song):
+            raise TypeError(f'song class not registered (register_song_class()): {type(song).__name__}')
+        raise TypeError('expected Song object')
+    fields = {"_Song__title": song.title, "is_unplugged": song.is_unplugged}
+    for name in ENUM_FIELDS:
+        if hasattr(song, name):
+            fields[name] = enum_code(getattr(song, name))
+    return {tag: fields}
 
 
 def song_json_to_py(song_json):
     """JSON decoder for Song objects (object_hook= parameter in json.loads()).
+    Decodes the songs encoded by song_py_to_json() (of any class registered in SONG_TAGS), as well as the legacy
+    {"__Song__": {...}} objects (with the fields of __dict__, including any fields that were added on the fly).
+    The class is found by the tag in a single lookup in SONG_TAGS, and the song is created without calling __init__();
+    the fields missing from the payload take their values in Song('') (an empty title, not unplugged).
 
     It is essential to run this code in the debugger. If the breakpoint is set at the very first line (the if statement)
     it is possible to see that, internally, this function runs TWICE per call (!!!) -
@@ -120,10 +356,24 @@ def song_json_to_py(song_json):
     suddenly song_json DOES include "__Song__" and everything works fine (!?!?!).
     """
 
-    if "__Song__" in song_json:
-        s = Song('')
-        s.__dict__.update(song_json["__Song__"])
-        return s
+    if len(song_json) == 1:
+        tag, fields = next(iter(song_json.items()))
+        cls = SONG_TAGS.get(tag)
+        if cls is not None:
+            s = object.__new__(cls)
+            s._Song__title = ''                     # the fields of Song(''), for the fields missing from the payload
+            s.is_unplugged = False
+            for name, value in fields.items():
+                if name in ENUM_FIELDS:
+                    value = ENUM_MEMBERS[ENUM_FIELDS[name]][value]
+                    if value is None:
+                        continue
+                elif name == '_Song__title':
+                    value = intern_title(value)
+                elif name not in FIELD_NAMES:       # skips the fields added on the fly before Song had __slots__
+                    continue
+                setattr(s, name, value)
+            return s
     return song_json
 
 
@@ -141,6 +391,10 @@ class Ballad(Song):
     #     super().__init__(title, is_unplugged)
     #     self.tempo = tempo
 
+    __slots__ = ()                                          # tempo is a slot declared in Song
+    RECORD_ARGS = ('title', 'is_unplugged', 'tempo')       # see Song.from_records()
+    RECORD_DEFAULTS = (False, Tempo.SLOW)
+
     # Version 2 - with multiple inheritance
     def __init__(self, tempo=Tempo.SLOW, **kwargs):
         super().__init__(**kwargs)
@@ -149,14 +403,13 @@ class Ballad(Song):
     def __str__(self):
         return super().__str__() + '; ballad'
 
-    def __eq__(self, other):
-        # Recommended if inheritance is involved
-        # (https://stackoverflow.com/questions/390250/elegant-ways-to-support-equivalence-equality-in-python-classes):
-        # if type(other) is type(self):
-        #     return self.__dict__ == other.__dict__
-        # return False
-
-        return self.__dict__ == other.__dict__ if type(self) is type(other) else False
+    # __eq__(), the ordering and __hash__() are inherited from Song (the comparison key includes the class).
+    # Recommended if inheritance is involved
+    # (https://stackoverflow.com/questions/390250/elegant-ways-to-support-equivalence-equality-in-python-classes):
+    # def __eq__(self, other):
+    #     if type(other) is type(self):
+    #         return self.__dict__ == other.__dict__              # self._fields(), since Song has __slots__
+    #     return False
 
     def play(self, artist, *args, **kwargs):
         """Assumes that artist, *args (e.g. expressions of gratitude) and kwargs.values() (e.g. messages) are strings.
@@ -179,6 +432,10 @@ class PianoSong(Song):
     #     super().__init__(title, is_unplugged)
     #     self.instrument = instrument
 
+    __slots__ = ()                                          # instrument is a slot declared in Song
+    RECORD_ARGS = ('title', 'is_unplugged', 'instrument')  # see Song.from_records()
+    RECORD_DEFAULTS = (False, Instrument.PIANO)
+
     # Version 2 - with multiple inheritance
     def __init__(self, instrument=Instrument.PIANO, **kwargs):
         super().__init__(**kwargs)
@@ -187,14 +444,13 @@ class PianoSong(Song):
     def __str__(self):
         return super().__str__() + '; piano song'
 
-    def __eq__(self, other):
-        # Recommended if inheritance is involved
-        # (https://stackoverflow.com/questions/390250/elegant-ways-to-support-equivalence-equality-in-python-classes):
-        # if type(other) is type(self):
-        #     return self.__dict__ == other.__dict__
-        # return False
-
-        return self.__dict__ == other.__dict__ if type(self) is type(other) else False
+    # __eq__(), the ordering and __hash__() are inherited from Song (the comparison key includes the class).
+    # Recommended if inheritance is involved
+    # (https://stackoverflow.com/questions/390250/elegant-ways-to-support-equivalence-equality-in-python-classes):
+    # def __eq__(self, other):
+    #     if type(other) is type(self):
+    #         return self.__dict__ == other.__dict__              # self._fields(), since Song has __slots__
+    #     return False
 
     def details(self):
         """Just a simple method to indicate details of a piano song.
@@ -213,20 +469,121 @@ class PianoBallad(Ballad, PianoSong):
     https://stackoverflow.com/a/533675/1899061 (mixins explained, and what good they are in multiple inheritance)
     """
 
+    __slots__ = ()
+    RECORD_ARGS = ('title', 'is_unplugged', 'tempo', 'instrument')     # see Song.from_records()
+    RECORD_DEFAULTS = (False, Tempo.SLOW, Instrument.PIANO)
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
     def __str__(self):
         return super().__str__()
 
-    def __eq__(self, other):
-        # Recommended if inheritance is involved
-        # (https://stackoverflow.com/questions/390250/elegant-ways-to-support-equivalence-equality-in-python-classes):
-        # if type(other) is type(self):
-        #     return self.__dict__ == other.__dict__
-        # return False
+    # __eq__(), the ordering and __hash__() are inherited from Song (the comparison key includes the class).
+    # Recommended if inheritance is involved
+    # (https://stackoverflow.com/questions/390250/elegant-ways-to-support-equivalence-equality-in-python-classes):
+    # def __eq__(self, other):
+    #     if type(other) is type(self):
+    #         return self.__dict__ == other.__dict__              # self._fields(), since Song has __slots__
+    #     return False
+
+
+# The registry of the song classes: their kind codes (positions in SONG_CLASSES, e.g. in SongTable and song records)
+# and their JSON tags (song_py_to_json(), song_json_to_py()); more classes are added by register_song_class().
+SONG_CLASSES = [Song, Ballad, PianoSong, PianoBallad]
+KIND_CODES = {cls: code for code, cls in enumerate(SONG_CLASSES)}
+SONG_TAGS = {f'__{cls.__name__}__': cls for cls in SONG_CLASSES}
+CLASS_TAGS = {cls: tag for tag, cls in SONG_TAGS.items()}
+RECORD_FIELDS = ('kind', 'title', 'is_unplugged', 'tempo', 'instrument')     # the fields of song_to_record()
+
+
+def register_song_class(cls):
+    """Registers a (new) subclass of Song, giving it the next kind code and the tag __<class name>__,
+    so that its objects can be encoded and decoded by the codecs in this module. Can be used as a class decorator.
+    """
+
+    if not (isinstance(cls, type) and issubclass(cls, Song)):
+        raise TypeError('expected Song class')
+    tag = f'__{cls.__name__}__'
+    if tag in SONG_TAGS and SONG_TAGS[tag] is not cls:
+        raise ValueError(f'song class tag already registered: {tag}')
+    if cls not in KIND_CODES:
+        KIND_CODES[cls] = len(SONG_CLASSES)
+        SONG_CLASSES.append(cls)
+        SONG_TAGS[tag] = cls
+        CLASS_TAGS[cls] = tag
+    return cls
+
+
+def song_to_record(song):
+    """Returns the song as a compact record: [kind, title, is_unplugged, tempo, instrument],
+    where kind is the code of the song's class (its index in SONG_CLASSES)
+    and tempo and instrument are the compact codes of the enum members (0 if not set).
+    """
 
-        return self.__dict__ == other.__dict__ if type(self) is type(other) else False
+    return [KIND_CODES[type(song)], song.title, song.is_unplugged,
+            enum_code(getattr(song, 'tempo', None)), enum_code(getattr(song, 'instrument', None))]
+
+
+def song_from_record(kind, title, is_unplugged, tempo, instrument):
+    """Returns the song described by the fields of a record made by song_to_record() (the inverse of it).
+    The song is created without calling __init__() of its class, setting only the data fields that are in the record
+    (so that, e.g., a Song with a tempo and a Ballad without it are restored as they were); see Song.from_row().
+    """
+
+    return Song.from_row(kind, title, is_unplugged, tempo, instrument)
+
+
+def songs_py_to_json(songs, columnar=False):
+    """Bulk JSON encoder for lists of songs (of any class in the Song hierarchy), faster than SongEncoder for long lists.
+    Returns a JSON string with the songs as an array of compact records (song_to_record()):
+        {"__Songs__": [[kind, title, is_unplugged, tempo, instrument], ...]}
+    or, if columnar is True, as one array per field:
+        {"__SongColumns__": {"kind": [...], "title": [...], "is_unplugged": [...], "tempo": [...], "instrument": [...]}}
+    """
+
+    with gc_paused():
+        if columnar:
+            songs = list(songs)                     # iterated once per column
+            columns = {"kind": [KIND_CODES[type(song)] for song in songs],
+                       "title": [song.title for song in songs],
+                       "is_unplugged": [song.is_unplugged for song in songs],
+                       "tempo": [enum_code(getattr(song, 'tempo', None)) for song in songs],
+                       "instrument": [enum_code(getattr(song, 'instrument', None)) for song in songs]}
+            return json.dumps({"__SongColumns__": columns}, separators=(',', ':'))
+        return json.dumps({"__Songs__": [song_to_record(song) for song in songs]}, separators=(',', ':'))
+
+
+def songs_json_to_py(songs_json):
+    """Bulk JSON decoder for lists of songs encoded by songs_py_to_json() (in any of its layouts).
+    The JSON string is parsed without an object_hook, and the songs are then created in a single pass over the records.
+    """
+
+    with gc_paused():
+        songs = json.loads(songs_json)
+        if "__Songs__" in songs:
+            records = songs["__Songs__"]
+        elif "__SongColumns__" in songs:
+            records = zip(*[songs["__SongColumns__"][field] for field in RECORD_FIELDS])
+        else:
+            raise ValueError('expected JSON string made by songs_py_to_json()')
+        return Song.from_rows(records)
+
+
+def write_songs_ndjson(songs, file='songs.ndjson'):
+    """Writes songs (any iterable of songs, e.g. a generator) to an NDJSON file, one record (song_to_record()) per line,
+    streaming them without building the whole document in memory. A relative file is taken from get_data_dir().
+    Returns the number of songs written.
+    """
+
+    return write_ndjson(get_data_dir() / file, songs, song_to_record)
+
+
+def read_songs_ndjson(file='songs.ndjson'):
+    """Generates the songs from an NDJSON file written by write_songs_ndjson(), one line at a time.
+    """
+
+    return read_ndjson(get_data_dir() / file, lambda record: song_from_record(*record))
 
 
 if __name__ == "__main__":
@@ -257,8 +614,12 @@ if __name__ == "__main__":
     #   1. <object>.<new_attr> = <value>
     #   2. <object>.__setattr__('<new_attr>', <value>)      # counterpart: <object>.__getattribute__('<attr>')
     #   3. setattr(<object>, '<new_attr>', <value>))        # counterpart: getattr(<object>, '<attr>')
-    imagine.year = 1971
-    print(imagine.year)
+    # Not possible for Song objects, since Song has __slots__ (and no __dict__)
+    try:
+        imagine.year = 1971
+        print(imagine.year)
+    except AttributeError as e:
+        print(e)
     print()
 
     # Calling methods
@@ -279,7 +640,8 @@ if __name__ == "__main__":
 
     # Demonstrate object data fields and methods for Musician objects
     print(imagine.__dir__())
-    print(imagine.__dict__)
+    print(Song.__slots__)                                   # instead of imagine.__dict__
+    print(imagine._fields())
     print(imagine.__class__.__name__)
     print()
 
@@ -331,10 +693,36 @@ if __name__ == "__main__":
     print(imagine_py)
     print()
 
-    # # Try an object of different type
-    # hey_jude_json = json.dumps(hey_jude, default=song_py_to_json, indent=4)
+    # Objects of the subclasses are tagged with their classes, and their enums are encoded as codes
+    hey_jude_json = json.dumps(hey_jude, default=song_py_to_json)
+    print(hey_jude_json)
+    print(json.loads(hey_jude_json, object_hook=song_json_to_py) == hey_jude)
+    print(json.loads('{"__Song__": {"_Song__title": "Imagine", "is_unplugged": true, "year": 1971}}',
+                     object_hook=song_json_to_py))            # legacy payload, with a field added on the fly
+    print()
 
     # List of objects
 
     print()
 
+    # Bulk encoding/decoding of lists of songs (of different classes)
+    songs = [imagine, patience, let_it_be, hey_jude]
+    songs_json = songs_py_to_json(songs)
+    # songs_json = songs_py_to_json(songs, columnar=True)
+    print(songs_json)
+    print([str(song) for song in songs_json_to_py(songs_json)])
+    print(songs_json_to_py(songs_json) == songs)
+    print()
+
+    # Bulk construction of songs from records (rows of the constructor's arguments) or columns
+    print([str(song) for song in PianoBallad.from_records([('Hey Jude', False, Tempo.MODERATE), ('Let It Be',)])])
+    print(PianoBallad.from_records([('Hey Jude', False, Tempo.MODERATE)]) == [hey_jude])
+    print([str(song) for song in Song.from_columns(['Imagine', 'Love'], [True, False])])
+    print()
+
+    # # Streaming songs to/from an NDJSON file in the data directory
+    # print(write_songs_ndjson(Song(f'Song {i}') for i in range(1000)))
+    # for song in read_songs_ndjson():
+    #     print(song)
+    # print()
+
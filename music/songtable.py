@@ -0,0 +1,178 @@
+"""The class representing a columnar table of songs.
+It stores large collections of songs as a few compact arrays (columns) instead of as many Song objects,
+for fast scans and filters (analytics).
+"""
+
+from array import array
+from itertools import accumulate, compress, islice
+
+from music.song import *
+
+
+class SongTable:
+    """The class representing a columnar table of songs.
+    Each song is a row, and each column is a compact array with one item per row:
+    - titles: a string pool (the distinct titles, concatenated into a single str) with integer offsets into it,
+      and the index of each row's title in the pool (so equal titles are stored only once);
+    - kinds: the code of the song class (the index in SONG_CLASSES), as a byte;
+    - is_unplugged: as a byte (0/1);
+    - tempo, instrument: the compact codes of the enum members (enum_code()), as bytes (0 if not set).
+    Filters (where()) work on whole columns at once (bytes.translate() and bitwise and of big ints, both in C),
+    returning row numbers; the songs are materialized (as Song, Ballad,... objects) lazily, only when accessed.
+    The table is immutable; select() makes a new table from some of the rows.
+    """
+
+    def __init__(self, songs=()):
+        pool = {}                                   # title -> index in the pool (dicts keep the insertion order)
+        title_ids = array('I')
+        kinds = bytearray()
+        unplugged = bytearray()
+        tempos = bytearray()
+        instruments = bytearray()
+        for song in songs:
+            title_ids.append(pool.setdefault(song.title, len(pool)))
+            kinds.append(KIND_CODES[type(song)])
+            unplugged.append(bool(song.is_unplugged))
+            tempos.append(enum_code(getattr(song, 'tempo', None)))
+            instruments.append(enum_code(getattr(song, 'instrument', None)))
+        self.__pool = ''.join(pool)
+        self.__title_index = pool                   # title -> index in the pool, for where(title=...)
+        self.__offsets = array('I', accumulate(map(len, pool), initial=0))
+        self.__title_ids = title_ids
+        self.__kinds = bytes(kinds)
+        self.__unplugged = bytes(unplugged)
+        self.__tempos = bytes(tempos)
+        self.__instruments = bytes(instruments)
+
+    def __len__(self):
+        return len(self.__kinds)
+
+    def title(self, row):
+        title_id = self.__title_ids[row]
+        return self.__pool[self.__offsets[title_id]:self.__offsets[title_id + 1]]
+
+    def __getitem__(self, row):
+        """Materializes the song in the row (a new object of the song's class on each access).
+        """
+
+        return song_from_record(self.__kinds[row], self.title(row), bool(self.__unplugged[row]),
+                                self.__tempos[row], self.__instruments[row])
+
+    def __iter__(self):
+        return self.songs(range(len(self)))
+
+    def songs(self, rows, chunk_size=1024):
+        """Generates the songs in rows, materializing them (Song.from_rows()) in chunks of chunk_size rows
+        as they are consumed.
+        """
+
+        rows = iter(rows)
+        while chunk := list(islice(rows, chunk_size)):
+            yield from Song.from_rows([(self.__kinds[row], self.title(row), bool(self.__unplugged[row]),
+                                        self.__tempos[row], self.__instruments[row]) for row in chunk])
+
+    def __str__(self):
+        return '\n'.join([str(song) for song in self]) if len(self) else '(empty)'
+
+    def __eq__(self, other):
+        return self.__columns() == other.__columns() if type(self) is type(other) else False
+
+    def __columns(self):
+        titles = [self.title(row) for row in range(len(self))]
+        return titles, self.__kinds, self.__unplugged, self.__tempos, self.__instruments
+
+    @staticmethod
+    def __mask(column, codes):
+        """Returns the bytes with 1 in the rows whose code in column is one of codes, and 0 in the other rows.
+        """
+
+        table = bytearray(256)
+        for code in codes:
+            table[code] = 1
+        return column.translate(table)
+
+    def where(self, kind=None, is_unplugged=None, tempo=None, instrument=None, title=None):
+        """Returns the list of the row numbers of the songs that satisfy all the conditions that are not None:
+        - kind: a song class (its subclasses match as well, as in isinstance(), e.g. Ballad includes PianoBallad);
+        - is_unplugged: True or False;
+        - tempo, instrument: a Tempo/Instrument member;
+        - title: the exact title.
+        An example - all unplugged slow ballads:
+            table.where(kind=Ballad, is_unplugged=True, tempo=Tempo.SLOW)
+        """
+
+        masks = []
+        if kind is not None:
+            masks.append(self.__mask(self.__kinds, [KIND_CODES[cls] for cls in SONG_CLASSES if issubclass(cls, kind)]))
+        if is_unplugged is not None:
+            masks.append(self.__mask(self.__unplugged, [int(bool(is_unplugged))]))
+        if tempo is not None:
+            masks.append(self.__mask(self.__tempos, [enum_code(tempo)]))
+        if instrument is not None:
+            masks.append(self.__mask(self.__instruments, [enum_code(instrument)]))
+        if not masks and title is None:
+            return list(range(len(self)))
+        if masks:
+            bits = int.from_bytes(masks[0], 'little')
+            for mask in masks[1:]:
+                bits &= int.from_bytes(mask, 'little')
+            rows = compress(range(len(self)), bits.to_bytes(len(self), 'little'))
+        else:
+            rows = range(len(self))
+        if title is not None:
+            title_id = self.__title_id(title)
+            return [row for row in rows if self.__title_ids[row] == title_id] if title_id is not None else []
+        return list(rows)
+
+    def __title_id(self, title):
+        return self.__title_index.get(title)
+
+    def count(self, **conditions):
+        """Returns the number of the songs that satisfy the conditions (see where()).
+        """
+
+        return len(self.where(**conditions))
+
+    def select(self, rows):
+        """Returns a new table with the songs in rows (e.g. the result of where(), or any iterable of row numbers),
+        sharing this table's title pool.
+        """
+
+        rows = list(rows)
+        table = SongTable()
+        table.__pool = self.__pool
+        table.__title_index = self.__title_index
+        table.__offsets = self.__offsets
+        table.__title_ids = array('I', map(self.__title_ids.__getitem__, rows))
+        table.__kinds = bytes(map(self.__kinds.__getitem__, rows))
+        table.__unplugged = bytes(map(self.__unplugged.__getitem__, rows))
+        table.__tempos = bytes(map(self.__tempos.__getitem__, rows))
+        table.__instruments = bytes(map(self.__instruments.__getitem__, rows))
+        return table
+
+
+if __name__ == "__main__":
+
+    # Build a table from songs
+    table = SongTable([Song('Imagine'),
+                       Ballad(title='Patience', is_unplugged=True, tempo=Tempo.SLOW),
+                       Ballad(title='Patience', tempo=Tempo.SLOW),
+                       Ballad(title='November Rain', tempo=Tempo.MODERATE),
+                       PianoSong(title='Let It Be'),
+                       PianoBallad(title='Hey Jude', is_unplugged=True, tempo=Tempo.SLOW, instrument=Instrument.PIANO)])
+    print(table)
+    print(len(table))
+    print()
+
+    # Filter, then materialize the songs
+    rows = table.where(kind=Ballad, is_unplugged=True, tempo=Tempo.SLOW)
+    print(rows)
+    print([str(song) for song in table.songs(rows)])
+    print(table.count(instrument=Instrument.PIANO))
+    print(table.where(title='Patience'))
+    print()
+
+    # A new table from some of the rows
+    print(table.select(rows))
+    print(table.select(rows) == SongTable(table.songs(rows)))
+    print()
@@ -0,0 +1,174 @@
+"""Canned IMDb-style movie list pages and a local HTTP stand-in that serves them,
+so that the crawler (music.crawl) can be run and tested without the network.
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread, Lock
+from urllib.parse import urlsplit, parse_qs
+import random
+import time
+
+# Data
+
+YEARS = ['(1971)', '(1988, part 2)', '(video, 2002)', '(I) (2019)', '(2000)', '']
+
+ITEM_HTML = '''
+<div class="lister-item mode-detail">
+    <div class="lister-item-image ribbonize" data-tconst="tt{n:07d}">
+        <a href="/title/tt{n:07d}/">
+            <img alt="Movie {n}" class="loadlate" src="https://m.media-amazon.com/images/S/sash/placeholder.png"
+                 loadlate="https://m.media-amazon.com/images/M/tt{n:07d}.jpg" height="209" width="140">
+        </a>
+    </div>
+    <div class="lister-item-content">
+        <h3 class="lister-item-header">
+            <span class="lister-item-index unbold text-primary">{n}.</span>
+            <a href="/title/tt{n:07d}/">Movie {n}</a>
+            <span class="lister-item-year text-muted unbold">{year}</span>
+        </h3>
+        <p class="text-muted">Some plot outline of Movie {n}.</p>
+    </div>
+</div>'''
+
+PAGE_HTML = '''<!DOCTYPE html>
+<html>
+<head><title>Most Popular Rock Music Movies - IMDb</title></head>
+<body>
+<div id="main">
+<div class="lister list detail sub-list">
+<div class="lister-list">{items}
+</div>
+</div>
+</div>
+<h3 class="recently-viewed">Recently Viewed</h3>
+</body>
+</html>
+'''
+
+
+def list_page(page=1, items_per_page=50, pages=3):
+    """Returns the HTML text of a specific page of a multi-page IMDb-style movie list.
+    Pages after the last one (pages) contain no movies, just like on IMDb.
+    Each page ends with an 'h3' tag that does not refer to a movie (like 'Recently Viewed' on IMDb).
+    """
+
+    first = (page - 1) * items_per_page + 1
+    numbers = range(first, first + items_per_page) if 1 <= page <= pages else range(0)
+    items = ''.join([ITEM_HTML.format(n=n, year=YEARS[n % len(YEARS)]) for n in numbers])
+    return PAGE_HTML.format(items=items)
+
+
+def list_page_info(page=1, items_per_page=50, pages=3):
+    """Returns the (title, year, link, poster_link) tuples that music.crawl.get_m_info() should extract
+    from the corresponding list_page().
+    """
+
+    first = (page - 1) * items_per_page + 1
+    numbers = range(first, first + items_per_page) if 1 <= page <= pages else range(0)
+    info = []
+    for n in numbers:
+        year = ''.join([c for c in YEARS[n % len(YEARS)] if c.isdigit()])[:4] or 'unknown'
+        info.append((f'Movie {n}', year, f'https://www.imdb.com/title/tt{n:07d}/',
+                     f'https://m.media-amazon.com/images/M/tt{n:07d}.jpg'))
+    return info
+
+
+class FakeImdbServer:
+    """Local HTTP stand-in for IMDb keyword lists, serving list_page() pages on 127.0.0.1 (on a free port).
+    The page is taken from the 'page' query parameter of the request URL; delay (in seconds) simulates latency,
+    extended by a random jitter of up to jitter seconds.
+    Keep-alive is supported; the numbers of requests and (client) connections served are counted.
+    Pages are served with an ETag (that changes with version) and conditional requests (If-None-Match) are honored.
+    A fraction (error_rate) of the requests, chosen at random (seed), is answered with error_status instead of a page.
+    Use it as a context manager:
+        with FakeImdbServer(pages=5, delay=0.2) as server:
+            get_m_info(server.start_url, 5)
+    """
+
+    def __init__(self, pages=3, items_per_page=50, delay=0.0, jitter=0.0, error_rate=0.0, error_status=503, seed=0):
+        self.pages = pages
+        self.items_per_page = items_per_page
+        self.delay = delay
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.errors = 0
+        self.__random = random.Random(seed)
+        self.__lock = Lock()
+        self.version = 1
+        self.requests = 0
+        self.connections = 0
+        self.__httpd = None
+        self.__thread = None
+
+    @property
+    def port(self):
+        return self.__httpd.server_address[1]
+
+    @property
+    def start_url(self):
+        return f'http://127.0.0.1:{self.port}/search/keyword/?keywords=rock-music&mode=detail&page=1' \
+               f'&sort=moviemeter,asc'
+
+    def start(self):
+        server = self
+        lock = self.__lock
+        rand = self.__random
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def handle(self):
+                with lock:
+                    server.connections += 1
+                super().handle()
+
+            def do_GET(self):
+                with lock:
+                    server.requests += 1
+                    error = rand.random() < server.error_rate
+                    delay = server.delay + rand.uniform(0, server.jitter)
+                    server.errors += error
+                if delay:
+                    time.sleep(delay)
+                if error:
+                    self.send_response(server.error_status)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                page = int(parse_qs(urlsplit(self.path).query).get('page', ['1'])[0])
+                etag = f'"{server.version}-{page}-{server.items_per_page}-{server.pages}"'
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                body = list_page(page, server.items_per_page, server.pages).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.__httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.__httpd.daemon_threads = True
+        self.__thread = Thread(target=self.__httpd.serve_forever, daemon=True)
+        self.__thread.start()
+        return self
+
+    def stop(self):
+        self.__httpd.shutdown()
+        self.__httpd.server_close()
+        self.__thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
@@ -1,7 +1,10 @@
 """Utility functions.
 """
 
+from contextlib import contextmanager
 from datetime import date
+import gc
+import json
 from settings import *
 
 
@@ -49,6 +52,53 @@ def get_data_dir():
     return data_dir
 
 
+@contextmanager
+def gc_paused():
+    """Pauses the cyclic garbage collector while the with block runs (and restores its previous state afterwards).
+    Building many container objects (lists, dicts, objects) in bulk triggers repeated collections that scan them all
+    without finding any garbage; bulk loaders (e.g. music.song.songs_json_to_py()) run in this context to avoid that.
+    """
+
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def write_ndjson(file, objects, to_json=None, buffer_size=2**20):
+    """Writes objects to file (a path) as newline-delimited JSON (NDJSON), one object per line,
+    converting each object to a JSON-serializable value with to_json() first (if it is not None).
+    The objects are encoded and written one at a time through a buffer of buffer_size bytes,
+    so objects can be a generator of any length and the memory used does not depend on it.
+    Returns the number of objects written.
+    """
+
+    encode = json.JSONEncoder(separators=(',', ':')).encode
+    n = 0
+    with open(file, 'w', encoding='utf-8', buffering=buffer_size) as f:
+        for o in objects:
+            f.write(encode(to_json(o) if to_json else o))
+            f.write('\n')
+            n += 1
+    return n
+
+
+def read_ndjson(file, from_json=None):
+    """Generates the objects from an NDJSON file (a path), reading, decoding and yielding them one line at a time
+    (blank lines are skipped), converting each decoded value with from_json() (if it is not None).
+    The objects can be consumed before the whole file is read, with memory that does not depend on the file size.
+    """
+
+    decode = json.JSONDecoder().decode
+    with open(file, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield from_json(decode(line)) if from_json else decode(line)
+
+
 if __name__ == '__main__':
 
     pass
@@ -72,3 +122,10 @@ if __name__ == '__main__':
     print(get_data_dir())
     print()
 
+    # # Demonstrate write_ndjson(), read_ndjson()
+    # file = get_data_dir() / 'numbers.ndjson'
+    # print(write_ndjson(file, ({'n': i, 'square': i * i} for i in range(10))))
+    # for o in read_ndjson(file):
+    #     print(o)
+    # print()
+